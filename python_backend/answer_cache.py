@@ -0,0 +1,123 @@
+"""
+Answer Cache
+Bounded LRU/TTL cache of URAG responses keyed on the normalized question
+"""
+
+import os
+import re
+import string
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from config import Config
+
+_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(query: str) -> str:
+    """Normalize case, punctuation and whitespace so trivial rewordings share a key"""
+    query = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", query).strip()
+
+def data_fingerprint() -> Tuple:
+    """Modification stamps of the files answers are derived from"""
+    paths = [
+        Config.ENRICHED_FAQS_FILE,
+        Config.FAQ_ANSWERS_FILE,
+        Config.VECTOR_STORE_DIR,
+        os.path.join(Config.VECTOR_STORE_DIR, "chroma.sqlite3"),
+    ]
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+class AnswerCache:
+    def __init__(
+        self,
+        max_size: int = Config.ANSWER_CACHE_SIZE,
+        ttl: float = Config.ANSWER_CACHE_TTL,
+        check_interval: float = Config.CACHE_CHECK_INTERVAL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.check_interval = check_interval
+        
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = data_fingerprint()
+        self._last_check = time.monotonic()
+        
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _check_fingerprint(self):
+        """Drop every entry when the vector store or enriched FAQs change (caller holds the lock)"""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        
+        fingerprint = data_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            if self._entries:
+                print("Index data changed, clearing answer cache.")
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response for this question, if fresh"""
+        if self.max_size <= 0:
+            return None
+        
+        key = normalize_query(query)
+        with self._lock:
+            self._check_fingerprint()
+            
+            entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, query: str, result: Dict[str, Any]):
+        """Store a response, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all cached responses"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "invalidations": self.invalidations
+            }
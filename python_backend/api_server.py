@@ -5,11 +5,19 @@ Provides REST API endpoints for the React frontend
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import uvicorn
+import gc
 import os
+import json
+import time
+from config import Config
 from urag_inference import URAGInference
+from inference_pool import InferencePool, PoolSaturatedError
+from engine_startup import EngineStartup, PRELOAD_STAGES, RETRIEVAL_STAGES
+from metrics import metrics, render_family
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -27,19 +35,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class LatencyMiddleware:
+    """
+    Request latency per endpoint (streamed responses: time to the first byte).
+    Plain ASGI rather than @app.middleware, which wraps every request in a
+    BaseHTTPMiddleware layer; only registered when metrics are enabled.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                # The router has added the matched route to the scope by now
+                route = scope.get("route")
+                metrics.observe(
+                    "urag_http_request_duration_seconds",
+                    time.perf_counter() - start,
+                    endpoint=route.path if route else "unmatched",
+                    status=str(message["status"])
+                )
+            await send(message)
+        
+        await self.app(scope, receive, send_timed)
+
+if metrics.enabled:
+    app.add_middleware(LatencyMiddleware)
+
 # Initialize URAG inference engine
 urag_engine = None
+engine_startup = None
+
+# Retrieval (CPU-bound) runs on worker threads; LLM generation is awaited
+# natively and only limited in concurrency, so FAQ hits never queue behind
+# slow generations and waiting on the endpoint does not hold a thread
+retrieval_pool = InferencePool("retrieval", Config.RETRIEVAL_WORKERS, Config.INFERENCE_QUEUE_LIMIT)
+generation_pool = InferencePool("generation", Config.GENERATION_WORKERS, Config.INFERENCE_QUEUE_LIMIT)
+
+def preload():
+    """
+    Load the embedding model and the read-only indexes in this process, before
+    a pre-fork server starts its workers (see gunicorn.conf.py). Workers share
+    these pages copy-on-write and open their own Chroma clients and LLM
+    endpoint, which must not be carried across a fork.
+    """
+    global urag_engine, engine_startup
+    urag_engine = URAGInference(load=False)
+    engine_startup = EngineStartup(urag_engine)
+    engine_startup.run(PRELOAD_STAGES)
+    
+    # Keep the garbage collector in the workers from writing to (and so un-sharing) these objects
+    gc.collect()
+    gc.freeze()
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize URAG engine on startup"""
-    global urag_engine
-    try:
-        urag_engine = URAGInference()
-        print("URAG inference engine initialized successfully")
-    except Exception as e:
-        print(f"Error initializing URAG engine: {e}")
-        urag_engine = None
+    """Start loading the URAG engine in the background; /health reports progress"""
+    global urag_engine, engine_startup
+    if engine_startup is None:
+        urag_engine = URAGInference(load=False)
+        engine_startup = EngineStartup(urag_engine)
+    engine_startup.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the inference worker pools"""
+    if engine_startup:
+        engine_startup.stop()
+    retrieval_pool.shutdown()
+    generation_pool.shutdown()
+
+def _require(*stages: str):
+    """Raise 503 until the given engine components have loaded"""
+    if not engine_startup or not engine_startup.is_ready(*stages):
+        raise HTTPException(
+            status_code=503,
+            detail="The assistant is still starting up. Please try again in a moment.",
+            headers={"Retry-After": "5"}
+        )
 
 # Request/Response models
 class QueryRequest(BaseModel):
@@ -55,11 +135,22 @@ class QueryResponse(BaseModel):
     document_ids: List[str] = []
     matched_question: Optional[str] = None
 
+class BatchQueryRequest(BaseModel):
+    questions: List[str]
+
+class BatchQueryResponse(BaseModel):
+    results: List[QueryResponse]
+
 class StatsResponse(BaseModel):
     faq_count: int
     document_count: int
     total_variations: int
     framework_status: str
+    answer_cache: Dict[str, Any] = {}
+    semantic_cache: Dict[str, Any] = {}
+    embedding_cache: Dict[str, Any] = {}
+    reranker: Dict[str, Any] = {}
+    section_routing: Dict[str, Any] = {}
 
 # API Endpoints
 @app.get("/")
@@ -71,27 +162,124 @@ async def root():
         "framework": "Unified RAG (URAG)"
     }
 
+def _query_response(result: Dict[str, Any]) -> QueryResponse:
+    """Map an engine result onto the API response model"""
+    return QueryResponse(
+        response=result["content"],
+        type=result["type"],
+        confidence=result["confidence"],
+        sources=result.get("sources", []),
+        faq_id=result.get("faq_id"),
+        document_ids=result.get("document_ids", []),
+        matched_question=result.get("matched_question")
+    )
+
 @app.post("/query", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """Process user query through URAG framework"""
-    if not urag_engine:
+    _require(*RETRIEVAL_STAGES)
+    
+    try:
+        # Process query through URAG; speculation starts generation up front, so it needs the LLM
+        if Config.SPECULATIVE_TIERS and engine_startup.is_ready("llm"):
+            result = await urag_engine.aquery_speculative(
+                request.question,
+                run_blocking=retrieval_pool.run,
+                run_generation=generation_pool.run_async
+            )
+        else:
+            result = urag_engine.cached_answer(request.question)
+            if result is None:
+                route = await retrieval_pool.run(urag_engine.route, request.question)
+                if urag_engine.needs_generation(route):
+                    _require("llm")
+                    result = await generation_pool.run_async(urag_engine.aanswer, route)
+                else:
+                    result = urag_engine.answer(route)
+                urag_engine.remember_answer(request.question, result)
+        
+        return _query_response(result)
+    
+    except HTTPException:
+        raise
+    
+    except PoolSaturatedError as e:
+        print(f"Shedding query: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="The assistant is busy right now. Please try again in a moment.",
+            headers={"Retry-After": "5"}
+        )
+    
+    except Exception as e:
+        print(f"Error processing query: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error processing your question. Please try again."
+        )
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def process_query_batch(request: BatchQueryRequest):
+    """Process many questions in one call (evaluation sets, bulk reports)"""
+    _require(*RETRIEVAL_STAGES, "llm")
+    
+    if len(request.questions) > Config.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch can contain at most {Config.MAX_BATCH_SIZE} questions."
+        )
+    
+    try:
+        # The whole batch takes one generation slot; BATCH_MAX_CONCURRENCY bounds its LLM calls.
+        # Routing is shed with the single queries when the retrieval pool is full
+        results = await generation_pool.run_async(
+            urag_engine.aquery_batch, request.questions, retrieval_pool.run
+        )
+        return BatchQueryResponse(results=[_query_response(result) for result in results])
+    
+    except PoolSaturatedError as e:
+        print(f"Shedding batch: {e}")
         raise HTTPException(
             status_code=503,
-            detail="URAG engine not initialized. Please check server logs."
+            detail="The assistant is busy right now. Please try again in a moment.",
+            headers={"Retry-After": "5"}
+        )
+    
+    except Exception as e:
+        print(f"Error processing batch: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Error processing the batch. Please try again."
         )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/query/stream")
+async def stream_query(request: QueryRequest):
+    """Process user query through URAG framework, streaming the answer as Server-Sent Events"""
+    _require(*RETRIEVAL_STAGES)
     
     try:
-        # Process query through URAG
-        result = urag_engine.query(request.question)
-        
-        return QueryResponse(
-            response=result["content"],
-            type=result["type"],
-            confidence=result["confidence"],
-            sources=result.get("sources", []),
-            faq_id=result.get("faq_id"),
-            document_ids=result.get("document_ids", []),
-            matched_question=result.get("matched_question")
+        cached = urag_engine.cached_answer(request.question)
+        route = None
+        if cached is None:
+            route = await retrieval_pool.run(urag_engine.route, request.question)
+            if urag_engine.needs_generation(route):
+                # Shed before the stream starts, while a 503 can still be sent
+                _require("llm")
+                generation_pool.check_capacity()
+    
+    except HTTPException:
+        raise
+    
+    except PoolSaturatedError as e:
+        print(f"Shedding query: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="The assistant is busy right now. Please try again in a moment.",
+            headers={"Retry-After": "5"}
         )
     
     except Exception as e:
@@ -100,15 +288,35 @@ async def process_query(request: QueryRequest):
             status_code=500,
             detail="Error processing your question. Please try again."
         )
+    
+    async def event_stream():
+        if cached is not None:
+            yield _sse("answer", cached)
+            return
+        
+        if not urag_engine.needs_generation(route):
+            async for event in urag_engine.astream_answer(route):
+                yield _sse(event["event"], event["data"])
+            return
+        
+        try:
+            async with generation_pool.slot():
+                async for event in urag_engine.astream_answer(route):
+                    yield _sse(event["event"], event["data"])
+        except PoolSaturatedError as e:
+            print(f"Shedding query: {e}")
+            yield _sse("error", {"detail": "The assistant is busy right now. Please try again in a moment."})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """Get URAG framework statistics"""
-    if not urag_engine:
-        raise HTTPException(
-            status_code=503,
-            detail="URAG engine not initialized"
-        )
+    _require(*RETRIEVAL_STAGES)
     
     try:
         stats = urag_engine.get_stats()
@@ -117,7 +325,12 @@ async def get_stats():
             faq_count=stats["faq_count"],
             document_count=stats["document_count"],
             total_variations=stats["total_variations"],
-            framework_status="operational"
+            framework_status="operational",
+            answer_cache=stats["answer_cache"],
+            semantic_cache=stats["semantic_cache"],
+            embedding_cache=stats["embedding_cache"],
+            reranker=stats["reranker"],
+            section_routing=stats["section_routing"]
         )
     
     except Exception as e:
@@ -129,16 +342,59 @@ async def get_stats():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """Detailed health check; always 200 while the process is up"""
+    initialized = bool(engine_startup) and engine_startup.is_ready(*EngineStartup.STAGES)
+    serving = bool(engine_startup) and engine_startup.is_ready(*RETRIEVAL_STAGES)
     return {
-        "status": "healthy" if urag_engine else "unhealthy",
-        "urag_engine": "initialized" if urag_engine else "not_initialized",
+        # "degraded": queries are answered, but some component (e.g. the LLM) is still loading or failing
+        "status": "healthy" if initialized else "degraded" if serving else "starting",
+        "urag_engine": "initialized" if initialized else "initializing",
+        "components": engine_startup.stats() if engine_startup else {},
         "vector_stores": {
             "faq": "loaded" if urag_engine and urag_engine.faq_vectorstore else "not_loaded",
             "documents": "loaded" if urag_engine and urag_engine.doc_vectorstore else "not_loaded"
+        },
+        "inference_pools": {
+            "retrieval": retrieval_pool.stats(),
+            "generation": generation_pool.stats()
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Stage latencies, answers per tier, pool and startup state in the Prometheus text format"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=false)")
+    
+    pools = {"retrieval": retrieval_pool.stats(), "generation": generation_pool.stats()}
+    components = engine_startup.stats() if engine_startup else {}
+    # Read live from the worker answering this scrape, so labelled with it when there are several
+    worker = {"worker": str(os.getpid())} if metrics.directory else {}
+    return PlainTextResponse(
+        metrics.render()
+        + "".join(
+            render_family(name, metric_type, help_text, [({"pool": pool, **worker}, stats[field]) for pool, stats in pools.items()])
+            for name, metric_type, field, help_text in (
+                ("urag_pool_workers", "gauge", "workers", "Concurrency limit of the pool"),
+                ("urag_pool_active", "gauge", "active", "Calls running in the pool"),
+                ("urag_pool_queued", "gauge", "queued", "Calls waiting for a pool slot"),
+                ("urag_pool_completed_total", "counter", "completed", "Calls finished since start"),
+                ("urag_pool_rejected_total", "counter", "rejected", "Calls shed with a 503 since start"),
+            )
+        )
+        + render_family(
+            "urag_component_ready", "gauge", "1 once the engine component has loaded",
+            [({"component": name, **worker}, int(status["status"] == "ready")) for name, status in components.items()]
+        ),
+        media_type="text/plain; version=0.0.4"
+    )
+
+@app.get("/ready")
+async def readiness_check():
+    """200 once queries can be routed, 503 before; for load balancer readiness probes"""
+    _require(*RETRIEVAL_STAGES)
+    return {"status": "ready"}
+
 if __name__ == "__main__":
     # Run the server
     uvicorn.run(
@@ -0,0 +1,381 @@
+"""
+End-to-end pipeline benchmark
+URAG-D/URAG-F preparation throughput, index build time vs corpus size,
+URAGInference.query latency per tier and /query throughput under
+concurrent load, against a deterministic fake LLM. Prints JSON.
+
+    python benchmarks/bench_pipeline.py --llm-latency 0.2 --tokens-per-second 40
+    python benchmarks/bench_pipeline.py --sections tiers throughput --concurrency 1 8 32
+    python benchmarks/bench_pipeline.py --real-embeddings --output bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config copies the token into the environment; the fake LLM needs none
+os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "")
+
+from config import Config
+from answer_cache import AnswerCache
+from engine_startup import EngineStartup
+from fake_models import FakeLLM, HashEmbeddings
+from metrics import metrics
+from section_router import SECTION_KEYWORDS
+from semantic_cache import SemanticCache
+from urag_inference import URAGInference
+from urag_preparation import URAGPreparation
+from vector_indexing import VectorIndexer
+
+SECTIONS = ("preparation", "indexing", "tiers", "throughput")
+
+# Out-of-scope questions for the fallback tier
+OFF_TOPIC_VERBS = ("bake", "repair", "paint", "tune", "fold", "plant")
+OFF_TOPIC_NOUNS = ("sourdough loaf", "bicycle chain", "watercolour sky", "guitar string", "paper crane", "tomato seedling")
+OFF_TOPIC_PLACES = ("at home", "in winter", "on a budget", "without tools", "quickly", "for beginners")
+
+SYLLABLES = ("ka", "lo", "mi", "ten", "ra", "vu", "sen", "dor", "pa", "shi", "no", "gul", "ve", "tar")
+
+def _words(rng: random.Random, n: int) -> List[str]:
+    """Made-up words, so nothing in the corpus collides with real query text"""
+    return sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(n)})
+
+def synthetic_pages(n_pages: int, words_per_page: int, seed: int) -> List[Dict[str, Any]]:
+    """Crawled pages spread over the site sections, in the firecrawl format URAG-D reads"""
+    rng = random.Random(seed)
+    common = _words(rng, 300)
+    sections = sorted(SECTION_KEYWORDS)
+    vocabulary = {section: sorted(SECTION_KEYWORDS[section]) + _words(rng, 150) for section in sections}
+
+    pages = []
+    for i in range(n_pages):
+        section = sections[i % len(sections)]
+        sentences, count = [], 0
+        while count < words_per_page:
+            sentence = [rng.choice(vocabulary[section] if rng.random() < 0.6 else common) for _ in range(rng.randint(8, 14))]
+            sentences.append(" ".join(sentence).capitalize() + ".")
+            count += len(sentence)
+        pages.append({
+            "url": f"https://college.example/{section}/page-{i}",
+            "title": f"{section.title()} {i}",
+            "markdown": " ".join(sentences)
+        })
+    return pages
+
+def synthetic_index_data(n_docs: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Augmented chunks and enriched FAQs shaped like the preparation output, without calling an LLM"""
+    pages = synthetic_pages(n_docs, 60, seed)
+    docs = [
+        {
+            "id": f"doc_{i}_0",
+            "content": page["markdown"],
+            "augmented_content": page["markdown"],
+            "summary": page["markdown"].split(".")[0],
+            "metadata": {"url": page["url"], "title": page["title"], "section": page["url"].split("/")[3]}
+        }
+        for i, page in enumerate(pages)
+    ]
+    faqs = [
+        {
+            "id": f"faq_{i}",
+            "question": f"{' '.join(page['markdown'].split()[:6])}?",
+            "answer": page["markdown"].split(".")[0],
+            "variations": [f"Tell me {' '.join(page['markdown'].split()[:6])}"]
+        }
+        for i, page in enumerate(pages[:max(1, n_docs // 10)])
+    ]
+    return {"docs": docs, "faqs": faqs}
+
+def write_json(path: str, data: Any):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+@contextlib.contextmanager
+def working_directory(path: str):
+    """Run in a scratch directory; Config paths are relative, so data/ and vector_store/ land there"""
+    os.makedirs(path, exist_ok=True)
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+        # Chroma reuses clients by (relative) path; the next directory needs fresh ones
+        from chromadb.api.client import SharedSystemClient
+        SharedSystemClient.clear_system_cache()
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    values = 1000 * np.asarray(latencies)
+    return {
+        "count": len(values),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99))
+    }
+
+def make_llm(args) -> FakeLLM:
+    return FakeLLM(latency=args.llm_latency, tokens_per_second=args.tokens_per_second, max_tokens=args.llm_tokens)
+
+def bench_preparation(args, embeddings) -> Dict[str, Any]:
+    """URAG-D over synthetic pages (cold, then unchanged), then URAG-F"""
+    write_json(Config.COLLEGE_DATA_FILE, synthetic_pages(args.pages, args.page_words, args.seed))
+    write_json(Config.INITIAL_FAQS_FILE, [])
+    prep = URAGPreparation(llm=make_llm(args), embeddings=embeddings)
+
+    start = time.perf_counter()
+    augmented = prep.urag_d_augment_documents(use_firecrawl=True)
+    augment_seconds = time.perf_counter() - start
+    augment_calls = prep.llm_cache.stats()["misses"]
+
+    # Every page unchanged: only hashing and reuse of the previous output
+    start = time.perf_counter()
+    prep.urag_d_augment_documents(use_firecrawl=True)
+    rerun_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    faqs = prep.urag_f_enrich_faqs()
+    enrich_seconds = time.perf_counter() - start
+
+    return {
+        "urag_d": {
+            "pages": args.pages,
+            "chunks": len(augmented),
+            "llm_calls": augment_calls,
+            "seconds": augment_seconds,
+            "pages_per_second": args.pages / augment_seconds,
+            "chunks_per_second": len(augmented) / augment_seconds,
+            "unchanged_rerun_seconds": rerun_seconds
+        },
+        "urag_f": {
+            "faqs": len(faqs),
+            "llm_calls": prep.llm_cache.stats()["misses"] - augment_calls,
+            "seconds": enrich_seconds,
+            "faqs_per_second": len(faqs) / enrich_seconds if enrich_seconds else 0.0
+        }
+    }
+
+def build_indexes(n_docs: int, seed: int, embeddings) -> Dict[str, float]:
+    """Write a synthetic corpus and index it in the current directory"""
+    data = synthetic_index_data(n_docs, seed)
+    write_json(Config.AUGMENTED_DOCS_FILE, data["docs"])
+    write_json(Config.ENRICHED_FAQS_FILE, data["faqs"])
+
+    indexer = VectorIndexer(embeddings)
+    indexer.embeddings.embed_documents(["load the model before timing"])
+
+    report = {"docs": len(data["docs"]), "faqs": len(data["faqs"])}
+    for run in ("build", "unchanged_rebuild"):
+        start = time.perf_counter()
+        indexer.create_document_index()
+        doc_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        indexer.create_faq_index()
+        report[f"{run}_seconds"] = {"documents": doc_seconds, "faqs": time.perf_counter() - start}
+    report["docs_per_second"] = report["docs"] / report["build_seconds"]["documents"]
+    return report
+
+def bench_indexing(args, embeddings) -> List[Dict[str, Any]]:
+    results = []
+    for n_docs in args.corpus_sizes:
+        with working_directory(f"corpus_{n_docs}"):
+            results.append(build_indexes(n_docs, args.seed, embeddings))
+    return results
+
+def benchmark_queries(n_docs: int, n_queries: int, seed: int) -> List[str]:
+    """An even mix of FAQ questions, document lookups and out-of-scope questions for the serving corpus"""
+    data = synthetic_index_data(n_docs, seed)
+    rng = random.Random(seed + 1)
+    faq = [faq["question"] for faq in data["faqs"]]
+    # Near-verbatim chunk text: hashed embeddings only clear DOC_THRESHOLD on heavy overlap
+    document = [" ".join(doc["content"].split()[3:]) for doc in data["docs"]]
+    fallback = [
+        f"How do I {rng.choice(OFF_TOPIC_VERBS)} a {rng.choice(OFF_TOPIC_NOUNS)} {rng.choice(OFF_TOPIC_PLACES)}?"
+        for _ in range(n_queries)
+    ]
+
+    queries = []
+    for i in range(n_queries):
+        pool = (faq, document, fallback)[i % 3]
+        queries.append(pool[(i // 3) % len(pool)])
+    return queries
+
+def serving_engine(args, embeddings) -> URAGInference:
+    """A fully loaded engine with the fake LLM and both response caches off"""
+    engine = URAGInference(llm=make_llm(args), embeddings=embeddings, load=False)
+    engine.answer_cache = AnswerCache(max_size=0)
+    engine.semantic_cache = SemanticCache(max_size=0)
+    return engine
+
+def bench_tiers(args, engine: URAGInference, queries: List[str]) -> Dict[str, Any]:
+    """URAGInference.query latency grouped by the tier that answered, plus time per pipeline stage"""
+    metrics.reset()
+    by_tier: Dict[str, List[float]] = {}
+    for query in queries:
+        start = time.perf_counter()
+        result = engine.query(query)
+        by_tier.setdefault(result["type"], []).append(time.perf_counter() - start)
+
+    stages = {
+        labels["stage"]: {"count": count, "mean_ms": 1000 * total / count}
+        for labels, count, total in metrics.totals("urag_stage_duration_seconds")
+        if count
+    }
+
+    # The same questions again with the exact-match answer cache in front
+    engine.answer_cache = AnswerCache()
+    for query in queries:
+        engine.query(query)
+    cached = []
+    for query in queries:
+        start = time.perf_counter()
+        engine.query(query)
+        cached.append(time.perf_counter() - start)
+    engine.answer_cache = AnswerCache(max_size=0)
+
+    report = {tier: percentiles(latencies) for tier, latencies in sorted(by_tier.items())}
+    report["answer_cache"] = percentiles(cached)
+    return {"tiers": report, "stages": stages}
+
+async def _load_test(app, queries: List[str], concurrency: int, n_requests: int) -> Dict[str, Any]:
+    import httpx
+
+    latencies, statuses = [], {}
+    next_request = iter(range(n_requests))
+
+    async def client_loop(client):
+        for i in next_request:
+            start = time.perf_counter()
+            response = await client.post("/query", json={"question": queries[i % len(queries)]})
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # In-process ASGI transport: measures the server, not a socket or a client process
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        seconds = time.perf_counter() - start
+
+    failed = {code: count for code, count in statuses.items() if code != 200}
+    if failed:
+        # Error responses return early and would inflate requests_per_second
+        raise RuntimeError(f"/query at concurrency {concurrency} returned non-200 responses: {failed}")
+
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "seconds": seconds,
+        "requests_per_second": n_requests / seconds,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "latency": percentiles(latencies)
+    }
+
+def bench_throughput(args, engine: URAGInference, startup: EngineStartup, queries: List[str]) -> List[Dict[str, Any]]:
+    """/query under concurrent clients, through the API server's pools and middleware"""
+    import api_server
+    api_server.urag_engine = engine
+    api_server.engine_startup = startup
+
+    # One event loop for every level: the server's pools create their semaphores
+    # on first use, bound to the loop that was running then
+    async def load_tests():
+        return [
+            await _load_test(api_server.app, queries, concurrency, args.requests)
+            for concurrency in args.concurrency
+        ]
+
+    try:
+        return asyncio.run(load_tests())
+    finally:
+        api_server.retrieval_pool.shutdown()
+        api_server.generation_pool.shutdown()
+
+def environment(args) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embeddings": Config.EMBEDDING_MODEL if args.real_embeddings else "hash",
+        "llm": {"latency": args.llm_latency, "tokens_per_second": args.tokens_per_second, "max_tokens": args.llm_tokens},
+        "config": {
+            "faq_backend": Config.FAQ_BACKEND,
+            "doc_backend": Config.DOC_BACKEND,
+            "doc_quantization": Config.DOC_QUANTIZATION,
+            "hybrid_search": Config.HYBRID_SEARCH,
+            "section_routing": Config.SECTION_ROUTING,
+            "rerank": Config.RERANK,
+            "speculative_tiers": Config.SPECULATIVE_TIERS,
+            "augment_concurrency": Config.AUGMENT_CONCURRENCY,
+            "retrieval_workers": Config.RETRIEVAL_WORKERS,
+            "generation_workers": Config.GENERATION_WORKERS
+        }
+    }
+
+def run(args) -> dict:
+    # None: each component loads the model it uses in production
+    embeddings = None if args.real_embeddings else HashEmbeddings()
+    report = {"environment": environment(args), "seed": args.seed}
+
+    with tempfile.TemporaryDirectory() as directory:
+        if "preparation" in args.sections:
+            with working_directory(os.path.join(directory, "preparation")):
+                report["preparation"] = bench_preparation(args, embeddings)
+
+        if "indexing" in args.sections:
+            with working_directory(os.path.join(directory, "indexing")):
+                report["indexing"] = bench_indexing(args, embeddings)
+
+        if "tiers" in args.sections or "throughput" in args.sections:
+            with working_directory(os.path.join(directory, "serving")):
+                build_indexes(args.serving_docs, args.seed, embeddings)
+                queries = benchmark_queries(args.serving_docs, args.queries, args.seed)
+                engine = serving_engine(args, embeddings)
+                startup = EngineStartup(engine)
+                startup.run()
+
+                if "tiers" in args.sections:
+                    report["tiers"] = bench_tiers(args, engine, queries)
+                if "throughput" in args.sections:
+                    report["throughput"] = bench_throughput(args, engine, startup, queries)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--real-embeddings", action="store_true", help=f"use {Config.EMBEDDING_MODEL} instead of hashed bag-of-words vectors")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--llm-tokens", type=int, default=64, help="fake LLM response length")
+    parser.add_argument("--pages", type=int, default=20, help="crawled pages for URAG-D")
+    parser.add_argument("--page-words", type=int, default=300)
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--serving-docs", type=int, default=500, help="corpus size for the tier and throughput runs")
+    parser.add_argument("--queries", type=int, default=60, help="distinct queries for the tier and throughput runs")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    # The pipeline's progress messages go to stderr so stdout is only the report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,109 @@
+"""
+Quantized document index benchmark
+Recall@k, routing agreement, memory and latency of int8/binary storage
+against exact float32 search. Prints JSON.
+
+    python benchmarks/bench_quantization.py --docs 50000 --k 2
+    python benchmarks/bench_quantization.py --from-index   # use vector_store/
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from faq_index import relevance_scores
+from quantized_index import QUANTIZATION_MODES, QuantizedDocIndex
+
+def synthetic_corpus(n_docs: int, dim: int, n_topics: int, seed: int) -> np.ndarray:
+    """Unit vectors clustered around topics, roughly like chunks of a few site sections"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, n_topics, n_docs)] + 0.8 * rng.standard_normal((n_docs, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def indexed_corpus() -> np.ndarray:
+    """The document vectors exported by vector_indexing.py"""
+    index = QuantizedDocIndex("int8")
+    if not index.load():
+        sys.exit("No document index found. Run vector_indexing.py first.")
+    return np.asarray(index._state[1])
+
+def make_queries(vectors: np.ndarray, n_queries: int, noise: float, seed: int) -> np.ndarray:
+    """Perturbed copies of random documents, so some clear DOC_THRESHOLD and some do not"""
+    rng = np.random.default_rng(seed + 1)
+    queries = vectors[rng.integers(0, len(vectors), n_queries)]
+    queries = queries + noise * rng.standard_normal(queries.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def run(args) -> dict:
+    vectors = indexed_corpus() if args.from_index else synthetic_corpus(args.docs, args.dim, args.topics, args.seed)
+    queries = make_queries(vectors, args.queries, args.noise, args.seed)
+    k = min(args.k, len(vectors))
+
+    start = time.perf_counter()
+    exact = relevance_scores(queries, vectors)
+    baseline_seconds = time.perf_counter() - start
+    exact_top = np.argsort(-exact, axis=1)[:, :k]
+    exact_routed = exact.max(axis=1) >= Config.DOC_THRESHOLD
+
+    report = {
+        "docs": len(vectors),
+        "dim": vectors.shape[1],
+        "queries": len(queries),
+        "k": k,
+        "rescore_factor": args.rescore_factor,
+        "doc_threshold": Config.DOC_THRESHOLD,
+        "float32": {
+            "memory_bytes": vectors.nbytes,
+            "mean_latency_ms": 1000 * baseline_seconds / len(queries),
+            "routed_fraction": float(exact_routed.mean())
+        }
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        ids = [str(i) for i in range(len(vectors))]
+        QuantizedDocIndex.save(ids, ids, [{"doc_id": i} for i in ids], vectors, directory)
+
+        for mode in QUANTIZATION_MODES:
+            index = QuantizedDocIndex(mode, directory, args.rescore_factor)
+            index.load()
+
+            start = time.perf_counter()
+            results = index.search_batch(queries.tolist(), k)
+            seconds = time.perf_counter() - start
+
+            recall, routing_agreement = [], []
+            for hits, expected, routed in zip(results, exact_top, exact_routed):
+                found = {int(doc.page_content) for doc, _ in hits}
+                recall.append(len(found & set(expected.tolist())) / k)
+                routing_agreement.append((bool(hits) and hits[0][1] >= Config.DOC_THRESHOLD) == routed)
+
+            report[mode] = {
+                "memory_bytes": index.memory_bytes(),
+                "memory_saved": 1 - index.memory_bytes() / vectors.nbytes,
+                f"recall@{k}": float(np.mean(recall)),
+                "routing_agreement": float(np.mean(routing_agreement)),
+                "mean_latency_ms": 1000 * seconds / len(queries)
+            }
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--from-index", action="store_true", help="benchmark the exported document index")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.6, help="query perturbation relative to a unit vector")
+    parser.add_argument("--k", type=int, default=Config.DOC_LIMIT)
+    parser.add_argument("--rescore-factor", type=int, default=Config.QUANTIZED_RESCORE_FACTOR)
+    parser.add_argument("--seed", type=int, default=0)
+    print(json.dumps(run(parser.parse_args()), indent=2))
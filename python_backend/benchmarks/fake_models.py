@@ -0,0 +1,103 @@
+"""
+Deterministic stand-ins for the LLM endpoint and the embedding model, so
+pipeline benchmarks measure this code rather than a remote service
+"""
+
+import asyncio
+import json
+import re
+import time
+import zlib
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9'-]*")
+
+class FakeLLM(LLM):
+    """
+    Answers after `latency` seconds (time to first token) plus one token
+    per 1/tokens_per_second. Responses depend only on the prompt: the URAG-F
+    prompts get well-formed JSON, everything else echoes the words of the
+    prompt's last field, so augmented chunks stay searchable.
+    """
+
+    latency: float = 0.05
+    tokens_per_second: float = 50.0
+    max_tokens: int = 64
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _response_tokens(self, prompt: str) -> List[str]:
+        if prompt.rstrip().endswith("Generated Q&A Pairs:"):
+            words = _WORD.findall(prompt.rsplit("Document Content:", 1)[-1])[:self.max_tokens]
+            pairs = [
+                {"question": f"What about {' '.join(words[i:i + 4])}?", "answer": " ".join(words[i:i + 16])}
+                for i in range(0, min(len(words), 48), 16)
+            ]
+            return json.dumps(pairs).split(" ")
+
+        if prompt.rstrip().endswith("Paraphrased Questions:"):
+            match = re.search(r"Original Question: (.*)", prompt)
+            question = match.group(1).strip().rstrip("?") if match else ""
+            variations = [f"Tell me {question}", f"{question} please", f"Could you explain {question}?"]
+            return json.dumps(variations).split(" ")
+
+        # The last field of the prompt, without its trailing label line
+        body = prompt.rstrip().rsplit("\n", 1)[0]
+        return body.split()[-self.max_tokens:]
+
+    def _delay(self, n_tokens: int) -> float:
+        return self.latency + n_tokens / self.tokens_per_second
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        tokens = self._response_tokens(prompt)
+        time.sleep(self._delay(len(tokens)))
+        return " ".join(tokens)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        tokens = self._response_tokens(prompt)
+        await asyncio.sleep(self._delay(len(tokens)))
+        return " ".join(tokens)
+
+    def _stream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[GenerationChunk]:
+        time.sleep(self.latency)
+        for i, token in enumerate(self._response_tokens(prompt)):
+            time.sleep(1 / self.tokens_per_second)
+            yield GenerationChunk(text=token if i == 0 else f" {token}")
+
+    async def _astream(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[GenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for i, token in enumerate(self._response_tokens(prompt)):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield GenerationChunk(text=token if i == 0 else f" {token}")
+
+class HashEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words unit vectors: texts sharing words score high, unrelated
+    texts near zero, at a small fraction of the model's cost
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            h = zlib.crc32(word.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0], norm = 1.0, 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,122 @@
+"""
+BM25 Index
+Lexical inverted index over the document chunks, for exact tokens
+(course codes, "FE", "MHT-CET", fee amounts) that embeddings match poorly
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from config import Config
+from faq_index import file_stamp
+
+_DIGIT_GROUPS = re.compile(r"(?<=\d),(?=\d)")
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens. Digit grouping is dropped so "1,50,000" matches
+    "150000", and compounds like "mht-cet" also yield their parts.
+    """
+    tokens = []
+    for token in _TOKEN.findall(_DIGIT_GROUPS.sub("", text.lower())):
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(re.split(r"[-./]", token))
+    return tokens
+
+class BM25Index:
+    """
+    Okapi BM25 over a persisted inverted index. The file is loaded on the
+    first search and reloaded when vector_indexing.py replaces it.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, path: str = Config.BM25_INDEX_FILE):
+        self.path = path
+        self._state = None  # (stamp, ids, postings), swapped whole on reload
+        self._lock = threading.Lock()
+        self._last_check = float("-inf")
+
+    @staticmethod
+    def save(ids: List[str], texts: List[str], path: str = Config.BM25_INDEX_FILE):
+        """Build the inverted index for these chunks and write it"""
+        postings: Dict[str, List[List[int]]] = {}
+        doc_lengths = []
+        for i, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([i, tf])
+
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({"ids": ids, "doc_lengths": doc_lengths, "postings": postings}, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    def _check_reload(self):
+        """Load on first use, then pick up a rebuilt index at most once per CACHE_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+                return
+            self._last_check = now
+
+            stamp = file_stamp(self.path)
+            if stamp is None or (self._state and stamp == self._state[0]):
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error loading BM25 index: {e}")
+                return
+
+            self._state = (stamp, index["ids"], self._weights(index))
+            print(f"BM25 index loaded ({len(index['ids'])} chunks, {len(index['postings'])} terms).")
+
+    def _weights(self, index: Dict) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Per term, the chunks containing it and their precomputed BM25 weights"""
+        doc_lengths = np.asarray(index["doc_lengths"], dtype=np.float32)
+        n_docs = len(doc_lengths)
+        avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+        norms = self.K1 * (1 - self.B + self.B * doc_lengths / (avg_length or 1.0))
+
+        weights = {}
+        for term, entries in index["postings"].items():
+            docs = np.fromiter((doc for doc, _ in entries), dtype=np.int32, count=len(entries))
+            tf = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (n_docs - len(entries) + 0.5) / (len(entries) + 0.5))
+            weights[term] = (docs, idf * tf * (self.K1 + 1) / (tf + norms[docs]))
+        return weights
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Top k (chunk id, BM25 score) pairs with a positive score, best first"""
+        self._check_reload()
+        if self._state is None:
+            return []
+
+        _, ids, weights = self._state
+        scores = np.zeros(len(ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in weights:
+                docs, term_weights = weights[term]
+                scores[docs] += term_weights
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
@@ -18,6 +18,57 @@ class Config:
     FAQ_LIMIT = 20
     DOC_LIMIT = 2
     
+    # Answer Cache
+    ANSWER_CACHE_SIZE = 1024  # 0 disables the cache
+    ANSWER_CACHE_TTL = 3600  # seconds
+    CACHE_CHECK_INTERVAL = 5  # seconds between index change checks
+    
+    # Semantic Cache (document and fallback answers only)
+    SEMANTIC_CACHE_SIZE = 512  # 0 disables the cache
+    SEMANTIC_CACHE_TTL = 3600  # seconds
+    SEMANTIC_CACHE_DISTANCE = 0.05  # max cosine distance to reuse an answer
+    
+    # API Server Concurrency
+    RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))  # embedding + vector search
+    GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "32"))  # concurrent LLM calls (async, no thread each)
+    INFERENCE_QUEUE_LIMIT = int(os.getenv("INFERENCE_QUEUE_LIMIT", "64"))  # waiting requests per pool before 503
+    STARTUP_RETRY_INTERVAL = 2  # seconds before retrying a component that failed to load, doubled per retry
+    STARTUP_RETRY_MAX_INTERVAL = 60
+    
+    # Pre-fork Serving (gunicorn.conf.py)
+    SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", "0"))  # 0 = one per core
+    SERVING_THREADS_PER_WORKER = int(os.getenv("SERVING_THREADS_PER_WORKER", "1"))  # torch threads in each worker
+    
+    # Metrics (/metrics, Prometheus text format)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_DIR = os.getenv("METRICS_DIR", "")  # shared by pre-forked workers so /metrics sums them (set by gunicorn.conf.py)
+    METRICS_FLUSH_INTERVAL = 5  # seconds between a worker's snapshots to METRICS_DIR
+    
+    # Batch Queries
+    MAX_BATCH_SIZE = 10000  # questions per /query/batch request
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # concurrent LLM calls per batch
+    
+    # Speculative Tier Execution (async path only)
+    SPECULATIVE_TIERS = os.getenv("SPECULATIVE_TIERS", "false").lower() == "true"
+    SPECULATIVE_FALLBACK_MARGIN = 0.1  # start fallback early when best doc score < DOC_THRESHOLD - margin
+    
+    # URAG-D Augmentation
+    AUGMENT_CONCURRENCY = int(os.getenv("AUGMENT_CONCURRENCY", "4"))  # LLM requests in flight
+    LLM_MAX_RETRIES = 3
+    LLM_RETRY_BACKOFF = 2.0  # seconds, doubled per attempt
+    
+    # Preparation LLM Response Cache
+    LLM_CACHE_MAX_ENTRIES = 200000
+    LLM_CACHE_MAX_AGE_DAYS = 90
+    
+    # Index Build Embedding
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))  # encoder processes, 0 = one per CPU core
+    
+    # Embedding Cache (index builds and query embedding)
+    EMBEDDING_CACHE_SIZE = 10000  # vectors kept in memory, 0 disables the memory tier
+    EMBEDDING_CACHE_MAX_ENTRIES = 2000000  # vectors kept on disk
+    
     # Model Configuration
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
     LLM_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
@@ -28,8 +79,34 @@ class Config:
     AUGMENTED_DOCS_FILE = f"{DATA_DIR}/augmented_docs.json"
     ENRICHED_FAQS_FILE = f"{DATA_DIR}/enriched_faqs.json"
     INITIAL_FAQS_FILE = f"{DATA_DIR}/initial_faqs.json"
+    AUGMENT_CHECKPOINT_FILE = f"{DATA_DIR}/augmented_docs.checkpoint.jsonl"
+    LLM_CACHE_FILE = f"{DATA_DIR}/llm_cache.sqlite3"
+    EMBEDDING_CACHE_DIR = f"{DATA_DIR}/embedding_cache"
     
     # Vector Store
     VECTOR_STORE_DIR = "vector_store"
     FAQ_COLLECTION = "faq_index"
-    DOC_COLLECTION = "doc_index"
\ No newline at end of file
+    DOC_COLLECTION = "doc_index"
+    FAQ_ANSWERS_FILE = f"{VECTOR_STORE_DIR}/faq_answers.json"  # faq_id -> answer
+    FAQ_BACKEND = os.getenv("FAQ_BACKEND", "chroma")  # "chroma" or "numpy" (in-memory exact search)
+    DOC_BACKEND = os.getenv("DOC_BACKEND", "chroma")  # "chroma" or "numpy" (exact, memory-mapped)
+    DOC_QUANTIZATION = os.getenv("DOC_QUANTIZATION", "none")  # "none" (DOC_BACKEND), "int8" or "binary"
+    QUANTIZED_RESCORE_FACTOR = 10  # candidates re-scored in float32 per result
+    BM25_INDEX_FILE = f"{VECTOR_STORE_DIR}/bm25_index.json"
+    SECTION_CENTROIDS_FILE = f"{VECTOR_STORE_DIR}/section_centroids.json"
+    
+    # Hybrid Document Retrieval (BM25 + vector, reciprocal rank fusion)
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"
+    HYBRID_CANDIDATES = 20  # first-stage depth of each retriever
+    RRF_K = 60
+    
+    # Section Routing (restrict document searches to the sections a query is about)
+    SECTION_ROUTING = os.getenv("SECTION_ROUTING", "false").lower() == "true"
+    SECTION_CENTROID_MARGIN = 0.05  # sections this close to the nearest centroid are also searched
+    
+    # Cross-Encoder Re-ranking of document candidates
+    RERANK = os.getenv("RERANK", "false").lower() == "true"
+    RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES = 10  # first-stage chunks re-scored per query
+    RERANK_BUDGET_MS = 150  # expected re-ranking time allowed per query
+    RERANK_CACHE_SIZE = 20000  # cached (question, chunk) scores
\ No newline at end of file
@@ -0,0 +1,289 @@
+"""
+Embedding Cache
+Embeddings keyed by (model name, text hash) with an in-memory LRU tier
+and a memory-mapped on-disk tier shared by index builds and inference
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking, run a single writer
+    fcntl = None
+
+KEY_SIZE = 16  # bytes of the sha256 digest kept per key
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps another Embeddings and only computes texts it has not seen before.
+    Queries and documents share keys, so a user question that matches an
+    indexed FAQ question exactly reuses the vector computed at index time.
+
+    On disk (one directory per model):
+        vectors.f32  float32 rows, memory-mapped read-only
+        keys.bin     16-byte key per row, in row order
+        meta.json    model, dim, the number of committed rows and a generation
+    Rows past the committed count (from a crash mid-append) are overwritten.
+    When the disk tier is full it is compacted: rows looked up by this
+    process (for an index build, the current corpus) are kept first, then
+    the newest, and the rewritten files get a new generation.
+
+    With persist=False (the inference engine) new vectors only go to the
+    memory tier, so user questions are never written to disk and a cache
+    miss costs no disk I/O; the disk tier is still read.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str = Config.EMBEDDING_MODEL,
+        cache_dir: str = Config.EMBEDDING_CACHE_DIR,
+        memory_size: int = Config.EMBEDDING_CACHE_SIZE,
+        max_disk_entries: int = Config.EMBEDDING_CACHE_MAX_ENTRIES,
+        persist: bool = True,
+        check_interval: float = Config.CACHE_CHECK_INTERVAL
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_size = memory_size
+        self.max_disk_entries = max_disk_entries
+        self.persist = persist
+        self.check_interval = check_interval
+
+        self.dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.keys_path = os.path.join(self.dir, "keys.bin")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, ".lock")
+
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._rows: Dict[bytes, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._count = 0
+        self._dim = None
+        self._generation = 0
+        self._meta_stamp = None
+        self._last_refresh = float("-inf")
+        self._used = set()  # disk keys looked up by this process, kept first when compacting
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.compactions = 0
+
+        os.makedirs(self.dir, exist_ok=True)
+        with self._lock:
+            self._refresh()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new = {key: np.asarray(vector, dtype=np.float32) for key, vector in zip(missing, vectors)}
+            self._store(new)
+            found.update(new)
+
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key].tolist()
+
+        vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+        self._store({key: vector})
+        return vector.tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tier"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_size": len(self._memory),
+                "disk_entries": self._count,
+                "compactions": self.compactions
+            }
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).digest()[:KEY_SIZE]
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Vectors already known for these keys, from memory first, then disk"""
+        found = {}
+        with self._lock:
+            refreshed = False
+            for key in keys:
+                if key in found:
+                    continue
+
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    found[key] = vector
+                    continue
+
+                if key not in self._rows and not refreshed and time.monotonic() - self._last_refresh >= self.check_interval:
+                    # Another process may have added it since we last looked
+                    self._refresh()
+                    refreshed = True
+
+                row = self._rows.get(key)
+                if row is not None:
+                    vector = np.array(self._vectors[row])
+                    self._remember(key, vector)
+                    if self.persist:
+                        self._used.add(key)
+                    self.disk_hits += 1
+                    found[key] = vector
+                else:
+                    self.misses += 1
+        return found
+
+    def _remember(self, key: bytes, vector: np.ndarray):
+        """Put a vector in the memory tier (caller holds the lock)"""
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _store(self, new: Dict[bytes, np.ndarray]):
+        with self._lock:
+            for key, vector in new.items():
+                self._remember(key, vector)
+            if not self.persist:
+                return
+            try:
+                self._append(new)
+            except OSError as e:
+                print(f"Error writing embedding cache: {e}")
+
+    def _refresh(self):
+        """Pick up rows committed since the last look (caller holds the lock)"""
+        self._last_refresh = time.monotonic()
+        try:
+            stat = os.stat(self.meta_path)
+        except OSError:
+            return
+        # meta.json is replaced on every commit, so a new inode means new rows
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._meta_stamp:
+            return
+
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        count = meta["count"]
+        generation = meta.get("generation", 0)
+        if count < self._count or meta["dim"] != self._dim or generation != self._generation:
+            # Cache was reset, rebuilt or compacted: start over
+            self._rows = {}
+            self._count = 0
+        self._dim = meta["dim"]
+        self._generation = generation
+
+        if count > self._count:
+            with open(self.keys_path, 'rb') as f:
+                f.seek(self._count * KEY_SIZE)
+                raw = f.read((count - self._count) * KEY_SIZE)
+            if len(raw) < (count - self._count) * KEY_SIZE:
+                return  # files swapped by a compaction mid-read; retry on the next look
+            for offset in range(0, len(raw), KEY_SIZE):
+                self._rows[raw[offset:offset + KEY_SIZE]] = self._count + offset // KEY_SIZE
+            self._count = count
+        self._meta_stamp = stamp
+
+        self._vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode='r', shape=(self._count, self._dim)
+        ) if self._count else None
+
+    def _append(self, new: Dict[bytes, np.ndarray]):
+        """Commit new vectors to disk (caller holds the lock)"""
+        with open(self.lock_path, 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            self._refresh()
+            rows = [
+                (key, vector) for key, vector in new.items()
+                if key not in self._rows and (self._dim is None or len(vector) == self._dim)
+            ]
+            rows = rows[:self.max_disk_entries]
+            if not rows:
+                return
+            dim = len(rows[0][1])
+
+            if self._count + len(rows) > self.max_disk_entries:
+                self._compact(self.max_disk_entries - len(rows), dim)
+
+            # Data first, then the committed count, so readers never see a partial row
+            for path, data, width in (
+                (self.vectors_path, np.stack([v for _, v in rows]).astype(np.float32).tobytes(), dim * 4),
+                (self.keys_path, b"".join(k for k, _ in rows), KEY_SIZE),
+            ):
+                with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+                    f.seek(self._count * width)
+                    f.write(data)
+
+            self._write_meta(dim, self._count + len(rows), self._generation)
+            self._refresh()
+
+    def _compact(self, keep: int, dim: int):
+        """
+        Rewrite the disk tier with at most `keep` rows: those this process has
+        looked up, then the newest (caller holds the lock and the file lock)
+        """
+        used = sorted(self._rows[key] for key in self._used if key in self._rows)[-keep:] if keep > 0 else []
+        used_set = set(used)
+        newest = [row for row in range(self._count - 1, -1, -1) if row not in used_set][:max(0, keep - len(used))]
+        kept = sorted(used + newest)
+
+        keys = sorted(self._rows, key=self._rows.get)
+        vectors = np.asarray(self._vectors[kept], dtype=np.float32) if kept else np.zeros((0, dim), dtype=np.float32)
+
+        # New files under new inodes: readers keep their old mapping until they see the new generation
+        for path, data in (
+            (self.vectors_path, vectors.tobytes()),
+            (self.keys_path, b"".join(keys[row] for row in kept)),
+        ):
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(data)
+            os.replace(f"{path}.tmp", path)
+
+        print(f"Compacted embedding cache from {self._count} to {len(kept)} entries")
+        self.compactions += 1
+        self._write_meta(dim, len(kept), self._generation + 1)
+        self._refresh()
+        self._used &= self._rows.keys()
+
+    def _write_meta(self, dim: int, count: int, generation: int):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"model": self.model_name, "dim": dim, "count": count, "generation": generation}, f)
+        os.replace(tmp_path, self.meta_path)
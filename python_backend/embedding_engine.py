@@ -0,0 +1,100 @@
+"""
+Batched embedding for index builds
+Sorts texts by length so batches pad less and can fan out across CPU cores
+"""
+
+import os
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from config import Config
+
+class EmbeddingEngine(Embeddings):
+    """
+    Sentence-transformers embeddings for bulk indexing.
+    Produces the same vectors as HuggingFaceEmbeddings for the same model.
+    """
+
+    # Texts per progress step (and per chunk handed to the process pool)
+    PROGRESS_STEP = 2048
+
+    def __init__(
+        self,
+        model_name: str = Config.EMBEDDING_MODEL,
+        batch_size: int = Config.EMBEDDING_BATCH_SIZE,
+        workers: int = Config.EMBEDDING_WORKERS
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self._model = None
+
+    @property
+    def model(self):
+        """Loaded on first use, so fully cached index builds never load it"""
+        if self._model is None:
+            # Imported here too, so indexing with other embeddings does not need torch
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in length-sorted batches, using a process pool for large inputs"""
+        if not texts:
+            return []
+
+        # Similar lengths in a batch means little padding; the original order is restored below
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        sorted_texts = [texts[i] for i in order]
+
+        if self.workers > 1 and len(texts) >= self.workers * self.batch_size:
+            vectors = self._encode_multi_process(sorted_texts)
+        else:
+            vectors = self._encode(sorted_texts, self._encode_batch)
+
+        embeddings = [None] * len(texts)
+        for position, i in enumerate(order):
+            embeddings[i] = vectors[position].tolist()
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode(text, show_progress_bar=False).tolist()
+
+    def _encode_batch(self, texts: List[str]):
+        return self.model.encode(texts, batch_size=self.batch_size, show_progress_bar=False)
+
+    def _encode_multi_process(self, texts: List[str]):
+        """Spread encoding over one CPU worker process per core"""
+        # Each worker gets an even share of the cores instead of all of them
+        previous_threads = os.environ.get("OMP_NUM_THREADS")
+        os.environ["OMP_NUM_THREADS"] = str(max(1, (os.cpu_count() or 1) // self.workers))
+        try:
+            pool = self.model.start_multi_process_pool(["cpu"] * self.workers)
+        finally:
+            if previous_threads is None:
+                os.environ.pop("OMP_NUM_THREADS")
+            else:
+                os.environ["OMP_NUM_THREADS"] = previous_threads
+
+        try:
+            return self._encode(texts, lambda chunk: self.model.encode_multi_process(
+                chunk,
+                pool,
+                batch_size=self.batch_size,
+                chunk_size=max(self.batch_size, len(chunk) // self.workers)
+            ))
+        finally:
+            self.model.stop_multi_process_pool(pool)
+
+    def _encode(self, texts: List[str], encode_chunk):
+        """Encode in progress steps, printing progress and throughput"""
+        vectors = []
+        start = time.perf_counter()
+        for offset in range(0, len(texts), self.PROGRESS_STEP):
+            vectors.extend(encode_chunk(texts[offset:offset + self.PROGRESS_STEP]))
+            done = min(offset + self.PROGRESS_STEP, len(texts))
+            elapsed = time.perf_counter() - start
+            print(f"Embedded {done}/{len(texts)} texts ({done / max(elapsed, 1e-9):.0f} texts/sec)")
+        return vectors
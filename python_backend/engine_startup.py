@@ -0,0 +1,107 @@
+"""
+Engine Startup
+Loads the URAG inference components in the background so the API server
+can bind and report per-component readiness while models are loading
+"""
+
+import threading
+import time
+from typing import Dict, Any, Tuple
+
+from config import Config
+from urag_inference import URAGInference
+
+# Components needed to route a query; generation additionally needs "llm"
+RETRIEVAL_STAGES = ("embeddings", "indexes", "vector_stores")
+
+# Components that can be loaded before a server forks its workers
+PRELOAD_STAGES = ("embeddings", "indexes", "warm_up")
+
+class EngineStartup:
+    """
+    Runs each load step of an unloaded URAGInference, on a background thread
+    (start) or the calling one (run). A stage starts once the stages it needs are ready; stages that fail are
+    retried, waiting STARTUP_RETRY_INTERVAL and doubling up to
+    STARTUP_RETRY_MAX_INTERVAL between rounds.
+    """
+
+    # stage -> (URAGInference method, stages it needs)
+    STAGES = {
+        "embeddings": ("load_embeddings", ()),
+        "indexes": ("load_indexes", ()),
+        "vector_stores": ("load_vector_stores", ("embeddings",)),
+        "warm_up": ("warm_up", ("embeddings", "indexes")),
+        "llm": ("load_llm", ()),
+    }
+
+    def __init__(
+        self,
+        engine: URAGInference,
+        retry_interval: float = Config.STARTUP_RETRY_INTERVAL,
+        max_retry_interval: float = Config.STARTUP_RETRY_MAX_INTERVAL
+    ):
+        self.engine = engine
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+
+        self._status = {
+            stage: {"status": "pending", "attempts": 0, "error": None, "seconds": None}
+            for stage in self.STAGES
+        }
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Load the stages that are not ready yet in the background; returns immediately"""
+        self._thread = threading.Thread(target=self.run, name="urag-startup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop retrying (a stage already loading finishes first)"""
+        self._stopped.set()
+
+    def run(self, stages: Tuple[str, ...] = tuple(STAGES)):
+        """Load the given stages on this thread, retrying until they are all ready or stop() is called"""
+        delay = self.retry_interval
+        while not self._stopped.is_set():
+            for stage in stages:
+                method, requires = self.STAGES[stage]
+                if self.is_ready(stage) or not self.is_ready(*requires):
+                    continue
+                self._load(stage, method)
+
+            if self.is_ready(*stages):
+                if self.is_ready(*self.STAGES):
+                    print("URAG inference engine initialized successfully")
+                return
+
+            self._stopped.wait(delay)
+            delay = min(delay * 2, self.max_retry_interval)
+
+    def _load(self, stage: str, method: str):
+        with self._lock:
+            self._status[stage]["status"] = "loading"
+            self._status[stage]["attempts"] += 1
+
+        start = time.perf_counter()
+        try:
+            getattr(self.engine, method)()
+        except Exception as e:
+            print(f"Error loading {stage}: {e}")
+            with self._lock:
+                self._status[stage].update(status="failed", error=str(e))
+            return
+
+        with self._lock:
+            self._status[stage].update(status="ready", error=None, seconds=round(time.perf_counter() - start, 3))
+        print(f"{stage} ready")
+
+    def is_ready(self, *stages: str) -> bool:
+        with self._lock:
+            return all(self._status[stage]["status"] == "ready" for stage in stages)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage status for /health"""
+        with self._lock:
+            return {stage: dict(status) for stage, status in self._status.items()}
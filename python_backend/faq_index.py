@@ -0,0 +1,221 @@
+"""
+FAQ Index
+Exact in-memory search over the FAQ questions and variations (tier 1)
+and the faq_id -> answer table both FAQ backends resolve answers from
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config import Config
+
+FAQ_VECTORS_FILE = "faq_vectors.f32"
+FAQ_ENTRIES_FILE = "faq_entries.json"
+
+def file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    """Identity of a file that is only ever replaced, never edited in place"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns)
+
+def relevance_scores(queries: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """
+    Relevance of every unit-norm row to every query: squared l2 distance as
+    Chroma computes it, converted like LangChain's euclidean relevance function
+    """
+    distances = np.sum(queries * queries, axis=1, keepdims=True) + 1.0 - 2.0 * (queries @ vectors.T)
+    return 1.0 - distances / math.sqrt(2)
+
+class FAQAnswerStore:
+    """
+    Each FAQ answer stored once, keyed by faq_id. Index entries only carry
+    the faq_id, and the answer is looked up after the top match is chosen.
+    """
+
+    def __init__(self, path: str = Config.FAQ_ANSWERS_FILE):
+        self.path = path
+        self._answers: Dict[str, str] = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._last_check = float("-inf")
+
+    @staticmethod
+    def save(answers: Dict[str, str], path: str = Config.FAQ_ANSWERS_FILE):
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(answers, f, ensure_ascii=False)
+        os.replace(f"{path}.tmp", path)
+
+    def get(self, faq_id: str) -> Optional[str]:
+        self._check_reload()
+        return self._answers.get(faq_id)
+
+    def _check_reload(self):
+        """Pick up a re-exported table, at most once per CACHE_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+                return
+            self._last_check = now
+
+            stamp = file_stamp(self.path)
+            if stamp is None or stamp == self._stamp:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._answers = json.load(f)
+                self._stamp = stamp
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error loading FAQ answers: {e}")
+
+class NumpyFAQIndex:
+    """
+    All FAQ embeddings in one contiguous, normalized float32 matrix.
+    A search is one matrix product followed by a partial sort, which for an
+    index of this size beats approximate search through Chroma.
+
+    Scores use Chroma's l2 space and LangChain's relevance conversion, so
+    FAQ_THRESHOLD means the same thing on either backend.
+    """
+
+    VECTORS_FILE = FAQ_VECTORS_FILE
+    ENTRIES_FILE = FAQ_ENTRIES_FILE
+
+    def __init__(self, directory: str = Config.VECTOR_STORE_DIR):
+        self.vectors_path = os.path.join(directory, self.VECTORS_FILE)
+        self.entries_path = os.path.join(directory, self.ENTRIES_FILE)
+
+        self._state = None  # (stamp, vectors, texts, metadatas, sections), swapped whole on reload
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+
+    @classmethod
+    def save(
+        cls,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        directory: str = Config.VECTOR_STORE_DIR
+    ):
+        """Write the index files (vectors first, so entries never point past them)"""
+        vectors = cls.normalized(embeddings, len(ids))
+
+        vectors_path = os.path.join(directory, cls.VECTORS_FILE)
+        entries_path = os.path.join(directory, cls.ENTRIES_FILE)
+
+        # Replace rather than overwrite: running servers keep their mapping of the old file
+        vectors.tofile(f"{vectors_path}.tmp")
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+
+        with open(f"{entries_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                "count": len(ids),
+                "dim": vectors.shape[1],
+                "ids": ids,
+                "texts": texts,
+                "metadatas": metadatas
+            }, f, ensure_ascii=False)
+        os.replace(f"{entries_path}.tmp", entries_path)
+
+    @staticmethod
+    def normalized(embeddings: List[List[float]], count: int) -> np.ndarray:
+        """Embeddings as a unit-norm float32 matrix"""
+        if count == 0:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(count, -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def load(self) -> bool:
+        """Load (or reload) the index files; returns False if they are missing"""
+        try:
+            stamp = file_stamp(self.entries_path)
+            with open(self.entries_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading FAQ index: {e}")
+            return False
+
+        count, dim = entries["count"], entries["dim"]
+        vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode='r', shape=(count, dim)
+        ) if count else np.zeros((0, dim), dtype=np.float32)
+
+        # Section labels for filtered searches; FAQ entries have none
+        sections = np.array([metadata.get("section", "") for metadata in entries["metadatas"]])
+        self._state = (stamp, vectors, entries["texts"], entries["metadatas"], sections)
+        return True
+
+    def _check_reload(self):
+        """Pick up a re-exported index, at most once per CACHE_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+                return
+            self._last_check = now
+            stamp = file_stamp(self.entries_path)
+            if stamp is None:
+                return
+            if self._state is None or stamp != self._state[0]:
+                if self.load():
+                    print("FAQ index reloaded.")
+
+    def __len__(self) -> int:
+        return len(self._state[2]) if self._state else 0
+
+    @staticmethod
+    def _rows(labels: np.ndarray, sections: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Indices of the entries in the given sections, or None for all entries"""
+        if sections is None:
+            return None
+        return np.flatnonzero(np.isin(labels, sections))
+
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        score_threshold: Optional[float] = None,
+        sections: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Per query, the top k (document, relevance score) pairs above the threshold,
+        best first. With `sections`, only entries in those sections are searched.
+        """
+        self._check_reload()
+        if self._state is None or not query_embeddings:
+            return [[] for _ in query_embeddings]
+
+        _, vectors, texts, metadatas, labels = self._state
+        rows = self._rows(labels, sections)
+        if rows is not None:
+            vectors = vectors[rows]
+        k = min(k, len(vectors))
+        if k == 0:
+            return [[] for _ in query_embeddings]
+
+        relevance = relevance_scores(np.asarray(query_embeddings, dtype=np.float32), vectors)
+
+        top = np.argpartition(-relevance, k - 1, axis=1)[:, :k]
+        batch_hits = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-relevance[row, candidates])]
+            entries = rows[ranked] if rows is not None else ranked
+            batch_hits.append([
+                (Document(page_content=texts[i], metadata=dict(metadatas[i])), float(relevance[row, j]))
+                for i, j in zip(entries, ranked)
+                if score_threshold is None or relevance[row, j] >= score_threshold
+            ])
+        return batch_hits
@@ -0,0 +1,62 @@
+"""
+Pre-fork multi-worker serving
+Run from python_backend/:  gunicorn -c gunicorn.conf.py api_server:app
+
+The master loads the embedding model and memory-mapped snapshots of the
+FAQ and document indexes once, then forks SERVING_WORKERS uvicorn workers
+that share those pages copy-on-write. Each worker opens its own Chroma
+client and LLM endpoint after the fork. Metrics are summed across workers
+through snapshot files in METRICS_DIR.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Set before the app imports torch and tokenizers: the master stays single-threaded,
+# so forking cannot leave an OpenMP or tokenizer thread pool half-initialized
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+# Serve both tiers from the memory-mapped snapshots vector_indexing.py exports
+os.environ.setdefault("FAQ_BACKEND", "numpy")
+os.environ.setdefault("DOC_BACKEND", "numpy")
+
+# Workers write metrics snapshots here and /metrics sums them, whichever worker is scraped
+_metrics_dir_created = "METRICS_DIR" not in os.environ
+os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="urag_metrics_"))
+
+from config import Config
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = Config.SERVING_WORKERS or multiprocessing.cpu_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+def on_starting(server):
+    """Load the shareable parts of the engine once, before the first fork"""
+    from metrics import metrics
+    metrics.clear_directory()
+    
+    import api_server
+    api_server.preload()
+
+def post_fork(server, worker):
+    """Give each worker its share of the cores for embedding and re-ranking"""
+    try:
+        import torch
+        torch.set_num_threads(Config.SERVING_THREADS_PER_WORKER)
+    except ImportError:
+        pass
+    
+    # Start from zero rather than count the master's preload once per worker
+    from metrics import metrics
+    metrics.reset()
+    metrics.start_flusher()
+
+def on_exit(server):
+    if _metrics_dir_created:
+        shutil.rmtree(Config.METRICS_DIR, ignore_errors=True)
@@ -0,0 +1,121 @@
+"""
+Inference Worker Pool
+Runs URAG work off the event loop with a bounded queue: blocking calls on
+worker threads, async calls (LLM I/O) under a concurrency limit
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+class PoolSaturatedError(Exception):
+    """Raised when a pool's queue is full and the request should be shed"""
+
+class InferencePool:
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        # Created on first use: threads for run(), a semaphore for slot()/run_async()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+        self._lock = threading.Lock()
+        self.pending = 0  # submitted and not yet finished
+        self.active = 0  # currently running
+        self.completed = 0
+        self.rejected = 0
+    
+    def _tracked(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            self.active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"urag-{self.name}"
+            )
+        return self._executor
+    
+    def _shed_if_full(self):
+        """Count and raise a rejection when the queue is full (caller holds the lock)"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self.name} pool is at capacity")
+    
+    def _admit(self):
+        """Reserve a place in the pool or shed the request"""
+        with self._lock:
+            self._shed_if_full()
+            self.pending += 1
+    
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+    
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run blocking fn(*args) on a worker thread, or raise PoolSaturatedError if too many are waiting"""
+        self._admit()
+        try:
+            future = self.executor.submit(self._tracked, fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the thread is done (or the call is cancelled before it starts),
+        # not when the awaiting task is cancelled while the thread keeps running
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+    
+    def check_capacity(self):
+        """Raise PoolSaturatedError now if a new request would be shed"""
+        with self._lock:
+            self._shed_if_full()
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of max_workers concurrency slots, e.g. for a whole streamed generation"""
+        self._admit()
+        try:
+            if self._semaphore is None:
+                self._semaphore = asyncio.Semaphore(self.max_workers)
+            async with self._semaphore:
+                with self._lock:
+                    self.active += 1
+                try:
+                    yield
+                finally:
+                    with self._lock:
+                        self.active -= 1
+        finally:
+            self._release()
+    
+    async def run_async(self, fn: Callable[..., Awaitable], *args) -> Any:
+        """Await fn(*args) with at most max_workers running at once, or raise PoolSaturatedError"""
+        async with self.slot():
+            return await fn(*args)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue-depth metrics for /health"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "active": self.active,
+                "queued": self.pending - self.active,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected
+            }
+    
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
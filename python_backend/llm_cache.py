@@ -0,0 +1,125 @@
+"""
+LLM Response Cache
+Persistent SQLite cache for preparation-phase LLM calls, keyed by a hash of
+prompt template + model + generation parameters + input
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+from config import Config
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        path: str = Config.LLM_CACHE_FILE,
+        max_entries: int = Config.LLM_CACHE_MAX_ENTRIES,
+        max_age_days: float = Config.LLM_CACHE_MAX_AGE_DAYS
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evict()
+    
+    @staticmethod
+    def make_key(template: str, model: str, params: Dict[str, Any], inputs: Dict[str, Any]) -> str:
+        """Content address of one LLM call"""
+        payload = json.dumps(
+            {"template": template, "model": model, "params": params, "inputs": inputs},
+            sort_keys=True, ensure_ascii=False, default=str  # params of injected LLMs may hold non-JSON values
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created >= ?",
+                (key, time.time() - self.max_age)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            self._conn.commit()
+    
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used beyond max_entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": size
+            }
+    
+    def report(self):
+        """Print hit-rate after a preparation step"""
+        stats = self.stats()
+        print(
+            f"LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['size']} entries stored."
+        )
+
+class CachedChain:
+    """prompt | llm | StrOutputParser with responses served from an LLMResponseCache"""
+    
+    def __init__(self, template: str, chain, cache: LLMResponseCache, model: str, params: Dict[str, Any]):
+        self.template = template
+        self.chain = chain
+        self.cache = cache
+        self.model = model
+        self.params = params
+    
+    def invoke(self, inputs: Dict[str, Any]) -> str:
+        key = self.cache.make_key(self.template, self.model, self.params, inputs)
+        response = self.cache.get(key)
+        if response is None:
+            response = self.chain.invoke(inputs)
+            self.cache.put(key, response)
+        return response
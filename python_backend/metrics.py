@@ -0,0 +1,230 @@
+"""
+Metrics
+Per-stage latency histograms and answer counters for the URAG pipeline,
+rendered in the Prometheus text format for /metrics
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+
+# Seconds; wide enough for a cache hit and a slow LLM generation
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "urag_stage_duration_seconds": "Time spent in each pipeline stage",
+    "urag_answers_total": "Answers served, by the tier that produced them",
+    "urag_http_request_duration_seconds": "HTTP request latency, by endpoint and status",
+}
+
+_NULL_SPAN = nullcontext()
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key: Tuple[Tuple[str, str], ...]) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+def render_family(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> str:
+    """One metric family in the text format, for values read at scrape time (e.g. pool stats)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines += [f"{name}{_format_labels(_label_key(labels))} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+class _Span:
+    """Times a `with` block into urag_stage_duration_seconds"""
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe("urag_stage_duration_seconds", time.perf_counter() - self.start, stage=self.stage)
+
+class Metrics:
+    """
+    Counters and histograms kept in process memory. When disabled, span()
+    returns a shared no-op context manager and the record methods return
+    immediately, so instrumented code pays one attribute check.
+
+    With a directory set (pre-forked workers), each process also writes its
+    values to a snapshot file there, every flush_interval and on each scrape,
+    and render() sums the snapshots of all workers. Files of workers that
+    exited are kept, so the sums never go down.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = Config.METRICS_ENABLED,
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+        directory: str = Config.METRICS_DIR,
+        flush_interval: float = Config.METRICS_FLUSH_INTERVAL
+    ):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters: Dict[Tuple[str, Tuple], float] = {}
+        # Per series: a count per bucket (the last one is +Inf), then the sum
+        self._histograms: Dict[Tuple[str, Tuple], List[float]] = {}
+        self._lock = threading.Lock()
+        self._snapshot_path = None
+        self._snapshot_pid = None
+        self._flush_lock = threading.Lock()  # the flusher thread and a scrape share the temp file
+
+    def span(self, stage: str):
+        """Context manager timing one pipeline stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            series[bucket] += 1
+            series[-1] += value
+
+    def totals(self, name: str) -> List[Tuple[Dict[str, str], int, float]]:
+        """(labels, count, sum) for each series of one histogram, for benchmark reports"""
+        with self._lock:
+            return [
+                (dict(labels), sum(series[:-1]), series[-1])
+                for (family, labels), series in sorted(self._histograms.items())
+                if family == name
+            ]
+
+    def reset(self):
+        """Drop everything recorded so far"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _copy(self) -> Tuple[Dict[Tuple[str, Tuple], float], Dict[Tuple[str, Tuple], List[float]]]:
+        with self._lock:
+            return dict(self._counters), {key: list(series) for key, series in self._histograms.items()}
+
+    def _own_snapshot_path(self) -> str:
+        """One file per process lifetime; a reused pid does not overwrite an exited worker's counts"""
+        if self._snapshot_pid != os.getpid():
+            self._snapshot_pid = os.getpid()
+            self._snapshot_path = os.path.join(self.directory, f"{self._snapshot_pid}-{uuid.uuid4().hex[:8]}.json")
+        return self._snapshot_path
+
+    def flush(self):
+        """Write this process's values to its snapshot file in the shared directory"""
+        if not (self.enabled and self.directory):
+            return
+        with self._flush_lock:
+            counters, histograms = self._copy()
+            path = self._own_snapshot_path()
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump({
+                    "counters": [[name, labels, value] for (name, labels), value in counters.items()],
+                    "histograms": [[name, labels, series] for (name, labels), series in histograms.items()]
+                }, f)
+            os.replace(f"{path}.tmp", path)
+
+    def start_flusher(self):
+        """Flush every flush_interval on a daemon thread (call in each worker after the fork)"""
+        if not (self.enabled and self.directory):
+            return
+
+        def flush_periodically():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    self.flush()
+                except OSError as e:
+                    print(f"Error writing metrics snapshot: {e}")
+
+        threading.Thread(target=flush_periodically, name="metrics-flush", daemon=True).start()
+
+    def clear_directory(self):
+        """Remove snapshots left by an earlier server run (call once, before forking workers)"""
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            os.remove(path)
+
+    def _merged(self) -> Tuple[Dict[Tuple[str, Tuple], float], Dict[Tuple[str, Tuple], List[float]]]:
+        """This process's values, or the sum over all workers' snapshots"""
+        if not self.directory:
+            return self._copy()
+
+        self.flush()
+        counters: Dict[Tuple[str, Tuple], float] = {}
+        histograms: Dict[Tuple[str, Tuple], List[float]] = {}
+        for path in glob.glob(os.path.join(self.directory, "*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot: Dict[str, Any] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue  # removed by clear_directory() while listing
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, series in snapshot["histograms"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                total = histograms.setdefault(key, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        return counters, histograms
+
+    def render(self) -> str:
+        """All counters and histograms in the Prometheus text format"""
+        counters, histograms = self._merged()
+
+        lines = []
+        for family in sorted({name for name, _ in counters}):
+            lines += [f"# HELP {family} {HELP.get(family, family)}", f"# TYPE {family} counter"]
+            for (name, labels), value in sorted(counters.items()):
+                if name == family:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for family in sorted({name for name, _ in histograms}):
+            lines += [f"# HELP {family} {HELP.get(family, family)}", f"# TYPE {family} histogram"]
+            for (name, labels), series in sorted(histograms.items()):
+                if name != family:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {series[-1]}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+# Shared by the inference engine and the API server
+metrics = Metrics()
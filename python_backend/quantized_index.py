@@ -0,0 +1,185 @@
+"""
+Document Indexes
+Exact in-memory search over the document chunks, and a quantized variant:
+int8 or binary codes in memory for candidate search, with the float32
+vectors memory-mapped from disk to re-score the top candidates exactly
+"""
+
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config import Config
+from faq_index import NumpyFAQIndex, relevance_scores
+
+QUANTIZATION_MODES = ("int8", "binary")
+
+# Set bits per byte value, for Hamming distances over packed sign bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def _popcount(packed: np.ndarray) -> np.ndarray:
+    # NumPy 2 has a native popcount; older versions use the lookup table
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(packed)
+    return _POPCOUNT[packed]
+
+class NumpyDocIndex(NumpyFAQIndex):
+    """
+    Document tier search over the memory-mapped float32 snapshot that
+    vector_indexing.py exports alongside Chroma (DOC_BACKEND="numpy").
+    Processes that map the same file share its pages.
+    """
+
+    VECTORS_FILE = "doc_vectors.f32"
+    ENTRIES_FILE = "doc_entries.json"
+
+class QuantizedDocIndex(NumpyDocIndex):
+    """
+    Document tier search over quantized embeddings.
+
+    int8:   per-dimension symmetric scale, 4x smaller than float32
+    binary: one sign bit per dimension, 32x smaller, ranked by Hamming distance
+
+    Only the codes are loaded into memory. The QUANTIZED_RESCORE_FACTOR * k
+    best candidates are re-scored against the float32 rows, so returned
+    scores are exact and DOC_THRESHOLD routing is unaffected; quantization
+    can only cost recall.
+    """
+
+    INT8_FILE = "doc_vectors.int8"
+    SCALES_FILE = "doc_scales.f32"
+    BINARY_FILE = "doc_vectors.bits"
+
+    def __init__(
+        self,
+        mode: str = Config.DOC_QUANTIZATION,
+        directory: str = Config.VECTOR_STORE_DIR,
+        rescore_factor: int = Config.QUANTIZED_RESCORE_FACTOR
+    ):
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode {mode!r}, expected one of {QUANTIZATION_MODES}")
+        super().__init__(directory)
+        self.mode = mode
+        self.rescore_factor = rescore_factor
+        self.directory = directory
+        self._quantized = None  # (state, codes, scales), swapped whole on reload
+
+    @staticmethod
+    def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes and per-dimension scales such that vectors ~= codes * scales"""
+        scales = np.abs(vectors).max(axis=0) / 127.0 if len(vectors) else np.ones(vectors.shape[1])
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+        return codes, scales
+
+    @staticmethod
+    def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+        """Sign bits packed eight dimensions per byte"""
+        return np.packbits(vectors > 0, axis=1)
+
+    @classmethod
+    def save(
+        cls,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        directory: str = Config.VECTOR_STORE_DIR
+    ):
+        """Write both code files, then the float32 vectors and entries"""
+        vectors = cls.normalized(embeddings, len(ids))
+        codes, scales = cls.quantize_int8(vectors)
+
+        for name, data in (
+            (cls.INT8_FILE, codes),
+            (cls.SCALES_FILE, scales),
+            (cls.BINARY_FILE, cls.quantize_binary(vectors)),
+        ):
+            path = os.path.join(directory, name)
+            data.tofile(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+
+        # Entries are written last; their replacement is what triggers a reload
+        super().save(ids, texts, metadatas, vectors, directory)
+
+    def load(self) -> bool:
+        if not super().load():
+            return False
+
+        state = self._state
+        count, dim = state[1].shape
+        try:
+            if self.mode == "int8":
+                codes = np.fromfile(os.path.join(self.directory, self.INT8_FILE), dtype=np.int8)
+                scales = np.fromfile(os.path.join(self.directory, self.SCALES_FILE), dtype=np.float32)
+                codes = codes.reshape(count, dim)
+            else:
+                codes = np.fromfile(os.path.join(self.directory, self.BINARY_FILE), dtype=np.uint8)
+                codes = codes.reshape(count, (dim + 7) // 8)
+                scales = None
+        except (OSError, ValueError) as e:
+            print(f"Error loading quantized document index: {e}")
+            return False
+
+        self._quantized = (state, codes, scales)
+        return True
+
+    def memory_bytes(self) -> int:
+        """Bytes held in memory for candidate search"""
+        if self._quantized is None:
+            return 0
+        _, codes, scales = self._quantized
+        return codes.nbytes + (scales.nbytes if scales is not None else 0)
+
+    def _approximate_scores(self, queries: np.ndarray, codes: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        """Queries x documents, higher is better; only the ranking matters"""
+        if self.mode == "int8":
+            return (queries * scales) @ codes.T
+        return np.stack([
+            -_popcount(np.bitwise_xor(codes, query_bits)).sum(axis=1, dtype=np.int32)
+            for query_bits in np.packbits(queries > 0, axis=1)
+        ])
+
+    def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        score_threshold: Optional[float] = None,
+        sections: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Per query, the top k (document, exact relevance score) pairs above the
+        threshold, best first. With `sections`, only chunks in those sections are searched.
+        """
+        self._check_reload()
+        if self._quantized is None or not query_embeddings:
+            return [[] for _ in query_embeddings]
+
+        (_, vectors, texts, metadatas, labels), codes, scales = self._quantized
+        rows = self._rows(labels, sections)
+        if rows is not None:
+            codes = codes[rows]
+        k = min(k, len(codes))
+        if k == 0:
+            return [[] for _ in query_embeddings]
+        n_candidates = min(len(codes), k * self.rescore_factor)
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        top = np.argpartition(-self._approximate_scores(queries, codes, scales), n_candidates - 1, axis=1)
+
+        batch_hits = []
+        for query, row in zip(queries, top):
+            candidates = row[:n_candidates]
+            candidates = np.sort(rows[candidates] if rows is not None else candidates)
+
+            # Exact re-scoring touches only the candidate rows of the memory map
+            exact = relevance_scores(query[None, :], np.asarray(vectors[candidates]))[0]
+            ranked = np.argsort(-exact)[:k]
+            batch_hits.append([
+                (Document(page_content=texts[candidates[i]], metadata=dict(metadatas[candidates[i]])), float(exact[i]))
+                for i in ranked
+                if score_threshold is None or exact[i] >= score_threshold
+            ])
+        return batch_hits
@@ -0,0 +1,120 @@
+"""
+Cross-Encoder Re-ranker
+Re-scores first-stage document candidates against the query on CPU
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Tuple
+
+from langchain_core.documents import Document
+
+from answer_cache import normalize_query
+from config import Config
+
+class Reranker:
+    """
+    One batched cross-encoder forward pass per query. Scores are cached per
+    (question, chunk text), and the number of pairs scored is capped so the
+    expected cost stays within RERANK_BUDGET_MS (but is never zero); unscored
+    candidates keep their first-stage order after the scored ones.
+    """
+
+    def __init__(
+        self,
+        model_name: str = Config.RERANK_MODEL,
+        budget_ms: float = Config.RERANK_BUDGET_MS,
+        cache_size: int = Config.RERANK_CACHE_SIZE
+    ):
+        self.model_name = model_name
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._scores: "OrderedDict[Tuple[str, bytes], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ms_per_pair = None  # running estimate from past batches
+
+        self.cache_hits = 0
+        self.pairs_scored = 0
+        self.pairs_skipped = 0
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                # Imported here so the server does not pay for torch unless re-ranking is used
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name, device="cpu")
+            return self._model
+
+    def rerank(self, query: str, candidates: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """
+        Candidates reordered by cross-encoder score. The float in each pair is
+        still the first-stage vector relevance, which routing and confidence use.
+        """
+        if len(candidates) < 2:
+            return candidates
+
+        question = normalize_query(query)
+        keys = [(question, hashlib.sha1(doc.page_content.encode("utf-8")).digest()) for doc, _ in candidates]
+
+        scores = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[i] = self._scores[key]
+                    self.cache_hits += 1
+            ms_per_pair = self._ms_per_pair
+
+        missing = [i for i in range(len(candidates)) if i not in scores]
+        if ms_per_pair:
+            # Always score at least one pair: a fresh measurement is the only way
+            # the estimate recovers after a slow batch
+            affordable = max(1, int(self.budget_ms / ms_per_pair))
+            with self._lock:
+                self.pairs_skipped += max(0, len(missing) - affordable)
+            missing = missing[:affordable]
+
+        if missing:
+            try:
+                model = self.model  # load outside the timed section
+                start = time.perf_counter()
+                predicted = model.predict(
+                    [(query, candidates[i][0].page_content) for i in missing],
+                    batch_size=len(missing),
+                    show_progress_bar=False
+                )
+                elapsed_ms = 1000 * (time.perf_counter() - start)
+            except Exception as e:
+                print(f"Error re-ranking documents: {e}")
+                return candidates
+
+            with self._lock:
+                observed = elapsed_ms / len(missing)
+                self._ms_per_pair = observed if self._ms_per_pair is None else 0.8 * self._ms_per_pair + 0.2 * observed
+                self.pairs_scored += len(missing)
+                for i, score in zip(missing, predicted):
+                    scores[i] = float(score)
+                    if self.cache_size > 0:
+                        self._scores[keys[i]] = scores[i]
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        scored = sorted(scores, key=scores.get, reverse=True)
+        unscored = [i for i in range(len(candidates)) if i not in scores]
+        return [candidates[i] for i in scored + unscored]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cache_hits": self.cache_hits,
+                "pairs_scored": self.pairs_scored,
+                "pairs_skipped": self.pairs_skipped,
+                "ms_per_pair": self._ms_per_pair,
+                "cache_size": len(self._scores)
+            }
@@ -10,8 +10,8 @@ from urag_preparation import URAGPreparation
 from vector_indexing import VectorIndexer
 from urag_inference import URAGInference
 
-def run_complete_pipeline():
-    """Run the complete URAG pipeline"""
+def run_complete_pipeline(recrawl: bool = False):
+    """Run the complete URAG pipeline, reprocessing only pages that changed"""
     
     print("🚀 Starting URAG Pipeline for College Admission Chatbot")
     print("=" * 60)
@@ -19,7 +19,7 @@ def run_complete_pipeline():
     try:
         # Step 1: Data Collection
         print("\n📡 Step 1: Data Collection")
-        if not os.path.exists("data/college_data.json"):
+        if recrawl or not os.path.exists("data/college_data.json"):
             print("Crawling college website...")
             crawl_college_website()
         else:
@@ -29,13 +29,13 @@ def run_complete_pipeline():
         print("\n🔧 Step 2: URAG Preparation (URAG-D + URAG-F)")
         prep = URAGPreparation()
         
-        if not os.path.exists("data/augmented_docs.json"):
-            print("Running URAG-D: Document Augmentation...")
-            prep.urag_d_augment_documents()
-        else:
-            print("Using existing augmented documents.")
+        # Incremental: unchanged pages are reused from augmented_docs.json
+        print("Running URAG-D: Document Augmentation...")
+        prep.urag_d_augment_documents()
+        changes = prep.last_changes
+        docs_changed = any(changes.get(key) for key in ("added", "changed", "removed"))
         
-        if not os.path.exists("data/enriched_faqs.json"):
+        if docs_changed or not os.path.exists("data/enriched_faqs.json"):
             print("Running URAG-F: FAQ Enrichment...")
             prep.urag_f_enrich_faqs()
         else:
@@ -45,12 +45,10 @@ def run_complete_pipeline():
         print("\n🗂️ Step 3: Vector Store Indexing")
         indexer = VectorIndexer()
         
-        if not os.path.exists("vector_store"):
-            print("Creating vector indexes...")
-            indexer.create_faq_index()
-            indexer.create_document_index()
-        else:
-            print("Using existing vector indexes.")
+        # Incremental: only new or changed entries are embedded
+        print("Updating vector indexes...")
+        indexer.create_faq_index()
+        indexer.create_document_index()
         
         # Step 4: Test Inference
         print("\n🧠 Step 4: Testing URAG Inference")
@@ -80,5 +78,4 @@ def run_complete_pipeline():
         sys.exit(1)
 
 if __name__ == "__main__":
-    run_complete_pipeline()
-</parameter>
\ No newline at end of file
+    run_complete_pipeline(recrawl="--recrawl" in sys.argv)
@@ -0,0 +1,152 @@
+"""
+Section Router
+Predicts which site sections (admissions, fees, placements, ...) a query is
+about, so the document search can be restricted to those chunks
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from bm25_index import tokenize
+from config import Config
+from faq_index import file_stamp, relevance_scores
+
+# Query words that point at a section; sections match URAGPreparation._extract_section
+SECTION_KEYWORDS = {
+    "admissions": {
+        "admission", "admissions", "admit", "apply", "application", "eligibility", "eligible",
+        "cutoff", "cet", "mht-cet", "jee", "cap", "counselling", "counseling", "intake"
+    },
+    "academics": {
+        "course", "courses", "syllabus", "curriculum", "exam", "exams", "semester", "branch",
+        "branches", "department", "departments", "faculty", "subject", "subjects", "academic"
+    },
+    "fees": {
+        "fee", "fees", "cost", "costs", "tuition", "scholarship", "scholarships", "payment",
+        "refund", "installment"
+    },
+    "placements": {
+        "placement", "placements", "placed", "recruiter", "recruiters", "recruitment", "package",
+        "salary", "ctc", "internship", "internships", "companies"
+    },
+    "facilities": {
+        "hostel", "hostels", "library", "lab", "labs", "canteen", "transport", "bus", "sports",
+        "gym", "wifi", "facility", "facilities", "infrastructure", "campus"
+    },
+    "about": {
+        "history", "established", "founded", "accreditation", "accredited", "naac", "nba",
+        "ranking", "vision", "mission", "principal", "affiliated", "autonomous"
+    },
+}
+
+# Pages whose URL gave no section can be about anything, so they are always searched
+CATCH_ALL_SECTION = "general"
+
+class SectionRouter:
+    """
+    Keyword match first; if no keyword fires, the sections whose centroid
+    (mean chunk embedding, written by vector_indexing.py) is within
+    SECTION_CENTROID_MARGIN of the nearest one. Returns None when the
+    prediction would not narrow the search.
+    """
+
+    def __init__(self, path: str = Config.SECTION_CENTROIDS_FILE):
+        self.path = path
+        self._state = None  # (stamp, sections, unit-norm centroids), swapped whole on reload
+        self._lock = threading.Lock()
+        self._last_check = float("-inf")
+
+        self.routed = 0
+        self.unrouted = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def save(metadatas: List[Dict[str, Any]], embeddings: List[List[float]], path: str = Config.SECTION_CENTROIDS_FILE):
+        """Write the centroid of each section's chunk embeddings"""
+        members: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            members.setdefault((metadata or {}).get("section", CATCH_ALL_SECTION), []).append(i)
+
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(metadatas), -1) if metadatas else None
+        sections = sorted(members)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                "sections": sections,
+                "counts": [len(members[section]) for section in sections],
+                "centroids": [vectors[members[section]].mean(axis=0).tolist() for section in sections]
+            }, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _check_reload(self):
+        """Load on first use, then pick up new centroids at most once per CACHE_CHECK_INTERVAL"""
+        now = time.monotonic()
+        if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_check < Config.CACHE_CHECK_INTERVAL:
+                return
+            self._last_check = now
+
+            stamp = file_stamp(self.path)
+            if stamp is None or (self._state and stamp == self._state[0]):
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Error loading section centroids: {e}")
+                return
+
+            centroids = np.asarray(data["centroids"], dtype=np.float32)
+            if len(centroids):
+                norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+                centroids = centroids / np.where(norms > 0, norms, 1)
+            self._state = (stamp, data["sections"], centroids)
+
+    def predict(self, query: str, query_embedding: List[float]) -> Optional[List[str]]:
+        """The sections to search for this query, or None to search everything"""
+        self._check_reload()
+        if self._state is None:
+            return None
+
+        _, sections, centroids = self._state
+        tokens = set(tokenize(query))
+        predicted = {
+            section for section in sections
+            if tokens & SECTION_KEYWORDS.get(section, set())
+        }
+        if not predicted and len(centroids):
+            scores = relevance_scores(np.asarray([query_embedding], dtype=np.float32), centroids)[0]
+            best = scores.max()
+            predicted = {
+                section for section, score in zip(sections, scores)
+                if score >= best - Config.SECTION_CENTROID_MARGIN
+            }
+        if CATCH_ALL_SECTION in sections:
+            predicted.add(CATCH_ALL_SECTION)
+
+        with self._lock:
+            if not predicted or len(predicted) == len(sections):
+                self.unrouted += 1
+                return None
+            self.routed += 1
+        return sorted(predicted)
+
+    def record_fallback(self):
+        """A routed query found nothing above DOC_THRESHOLD in its sections"""
+        with self._lock:
+            self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sections": list(self._state[1]) if self._state else [],
+                "routed": self.routed,
+                "unrouted": self.unrouted,
+                "fallbacks": self.fallbacks
+            }
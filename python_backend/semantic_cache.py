@@ -0,0 +1,115 @@
+"""
+Semantic Cache
+Serves generated answers to near-paraphrases of earlier questions
+using a small in-memory matrix of normalized query embeddings
+"""
+
+import threading
+import time
+from typing import Dict, Any, Optional, List
+import numpy as np
+from config import Config
+from answer_cache import data_fingerprint
+
+class SemanticCache:
+    def __init__(
+        self,
+        max_size: int = Config.SEMANTIC_CACHE_SIZE,
+        max_age: float = Config.SEMANTIC_CACHE_TTL,
+        max_distance: float = Config.SEMANTIC_CACHE_DISTANCE,
+        check_interval: float = Config.CACHE_CHECK_INTERVAL
+    ):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self.check_interval = check_interval
+        
+        # Fixed slots: one row per cached query, allocated once the dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._results: List[Optional[Dict[str, Any]]] = [None] * max_size
+        self._created = np.full(max_size, -np.inf)
+        self._last_used = np.full(max_size, -np.inf)
+        
+        self._lock = threading.Lock()
+        self._fingerprint = data_fingerprint()
+        self._last_check = time.monotonic()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def _live_mask(self, now: float) -> np.ndarray:
+        """Slots holding an entry younger than max_age"""
+        return self._created >= now - self.max_age
+    
+    def _check_fingerprint(self, now: float):
+        """Forget every answer when the indexes they came from change (caller holds the lock)"""
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        
+        fingerprint = data_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._created[:] = -np.inf
+            self._results = [None] * self.max_size
+    
+    def lookup(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached answer within max_distance (cosine)"""
+        if self.max_size <= 0:
+            return None
+        
+        query = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._check_fingerprint(now)
+            
+            live = np.flatnonzero(self._live_mask(now))
+            if live.size and self._vectors is not None:
+                similarities = self._vectors[live] @ query
+                best = int(np.argmax(similarities))
+                if 1.0 - float(similarities[best]) <= self.max_distance:
+                    slot = live[best]
+                    self._last_used[slot] = now
+                    self.hits += 1
+                    return dict(self._results[slot])
+            
+            self.misses += 1
+            return None
+    
+    def add(self, embedding: List[float], result: Dict[str, Any]):
+        """Cache a generated answer, reusing an expired slot or evicting the least recently used one"""
+        if self.max_size <= 0:
+            return
+        
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            
+            # Expired and empty slots have last_used pushed to -inf so they are taken first
+            last_used = np.where(self._live_mask(now), self._last_used, -np.inf)
+            slot = int(np.argmin(last_used))
+            
+            self._vectors[slot] = vector
+            self._results[slot] = dict(result)
+            self._created[slot] = now
+            self._last_used[slot] = now
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for /stats"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": int(self._live_mask(time.monotonic()).sum()),
+                "max_size": self.max_size
+            }
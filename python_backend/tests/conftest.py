@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config copies the token into the environment at import time
+os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "")
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory; Config paths (data/, vector_store/) are relative"""
+    from chromadb.api.client import SharedSystemClient
+
+    # Chroma reuses clients by (relative) path; each test directory needs fresh ones
+    SharedSystemClient.clear_system_cache()
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    yield tmp_path
+    SharedSystemClient.clear_system_cache()
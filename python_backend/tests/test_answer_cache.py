@@ -0,0 +1,53 @@
+import json
+import time
+
+from answer_cache import AnswerCache, normalize_query
+from config import Config
+
+RESULT = {"type": "faq", "content": "The fee is 1 lakh.", "confidence": 0.9}
+
+def test_normalize_query():
+    assert normalize_query("  What is the FEE?? ") == "what is the fee"
+    assert normalize_query("B.Tech fees") == normalize_query("b tech   fees")
+
+def test_rewording_hits_and_returns_a_copy(workdir):
+    cache = AnswerCache(max_size=4, ttl=60)
+    cache.put("What is the fee?", RESULT)
+
+    hit = cache.get("what is the fee")
+    assert hit == RESULT
+    hit["content"] = "changed"
+    assert cache.get("What is the fee?")["content"] == RESULT["content"]
+    assert cache.get("Where is the campus?") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+def test_evicts_least_recently_used(workdir):
+    cache = AnswerCache(max_size=2, ttl=60)
+    cache.put("a", RESULT)
+    cache.put("b", RESULT)
+    cache.get("a")
+    cache.put("c", RESULT)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+def test_expires_after_ttl(workdir):
+    cache = AnswerCache(max_size=2, ttl=0.05)
+    cache.put("a", RESULT)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+def test_cleared_when_index_data_changes(workdir):
+    cache = AnswerCache(max_size=2, ttl=60, check_interval=0)
+    cache.put("a", RESULT)
+    with open(Config.ENRICHED_FAQS_FILE, 'w', encoding='utf-8') as f:
+        json.dump([], f)
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+def test_disabled_with_zero_size(workdir):
+    cache = AnswerCache(max_size=0)
+    cache.put("a", RESULT)
+    assert cache.get("a") is None
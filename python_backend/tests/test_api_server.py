@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import api_server
+from metrics import metrics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_latency_recorded_per_route():
+    metrics.reset()
+    client = TestClient(api_server.app)
+    assert client.get("/").status_code == 200
+    client.get("/no-such-page")
+
+    endpoints = {(labels["endpoint"], labels["status"]) for labels, _, _ in metrics.totals("urag_http_request_duration_seconds")}
+    assert ("/", "200") in endpoints
+    assert ("unmatched", "404") in endpoints
+
+    body = client.get("/metrics").text
+    assert 'urag_http_request_duration_seconds_count{endpoint="/",status="200"} 1' in body
+
+def test_503_until_retrieval_is_loaded(monkeypatch):
+    monkeypatch.setattr(api_server, "engine_startup", None)
+    response = TestClient(api_server.app).post("/query", json={"question": "fees?"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+def test_no_middleware_when_metrics_disabled():
+    code = "import api_server; print([m.cls.__name__ for m in api_server.app.user_middleware])"
+    env = dict(os.environ, METRICS_ENABLED="false", HUGGINGFACEHUB_API_TOKEN="")
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == "['CORSMiddleware']"
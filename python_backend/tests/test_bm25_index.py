@@ -0,0 +1,29 @@
+from bm25_index import BM25Index, tokenize
+
+def test_tokenize_keeps_codes_and_their_parts():
+    assert tokenize("MHT-CET fees: 1,50,000") == ["mht-cet", "mht", "cet", "fees", "150000"]
+
+def build(tmp_path, texts):
+    path = str(tmp_path / "bm25.json")
+    BM25Index.save([f"doc_{i}" for i in range(len(texts))], texts, path=path)
+    return BM25Index(path)
+
+def test_exact_tokens_rank_first(tmp_path):
+    index = build(tmp_path, [
+        "Admission through the MHT-CET entrance exam.",
+        "The hostel fee is 1,50,000 per year.",
+        "Admission for FE students opens in June.",
+    ])
+    assert index.search("mht-cet cutoff", k=3)[0][0] == "doc_0"
+    assert [doc_id for doc_id, _ in index.search("150000", k=3)] == ["doc_1"]
+    ranked = [doc_id for doc_id, _ in index.search("FE admission", k=3)]
+    assert ranked[0] == "doc_2" and set(ranked) == {"doc_0", "doc_2"}
+
+def test_rare_terms_weigh_more(tmp_path):
+    index = build(tmp_path, ["college fees", "college hostel", "college library"])
+    scores = dict(index.search("college hostel", k=3))
+    assert max(scores, key=scores.get) == "doc_1"
+
+def test_no_match_or_no_index(tmp_path):
+    assert build(tmp_path, ["college fees"]).search("placements", k=3) == []
+    assert BM25Index(str(tmp_path / "missing.json")).search("fees", k=3) == []
@@ -0,0 +1,93 @@
+import os
+
+from langchain_core.embeddings import Embeddings
+
+from embedding_cache import CachedEmbeddings
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic 4-dim vectors; counts texts actually embedded"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _vector(self, text):
+        return [float(len(text)), float(sum(map(ord, text)) % 97), 1.0, 0.0]
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self._vector(text)
+
+def make_cache(tmp_path, model=None, **kwargs):
+    kwargs.setdefault("check_interval", 0)
+    return CachedEmbeddings(model or CountingEmbeddings(), model_name="test/model", cache_dir=str(tmp_path), **kwargs)
+
+def test_repeated_texts_are_embedded_once(tmp_path):
+    model = CountingEmbeddings()
+    cache = make_cache(tmp_path, model)
+    first = cache.embed_documents(["a", "bb", "a"])
+    assert cache.embed_documents(["bb", "a"]) == [first[1], first[0]]
+    assert cache.embed_query("a") == first[0]
+    assert model.calls == 2
+
+def test_disk_tier_is_shared_across_instances(tmp_path):
+    vectors = make_cache(tmp_path).embed_documents(["admission", "fees"])
+
+    model = CountingEmbeddings()
+    reader = make_cache(tmp_path, model, memory_size=0)
+    assert reader.embed_documents(["fees", "admission"]) == [vectors[1], vectors[0]]
+    assert model.calls == 0
+    assert reader.stats()["disk_hits"] == 2
+
+def test_without_persist_nothing_is_written(tmp_path):
+    indexed = make_cache(tmp_path)
+    indexed.embed_documents(["indexed question"])
+    entries = indexed.stats()["disk_entries"]
+
+    serving = make_cache(tmp_path, persist=False)
+    serving.embed_query("a user question")
+    serving.embed_documents(["another user question"])
+    assert serving.embed_query("indexed question") == indexed.embed_query("indexed question")
+    assert serving.stats()["disk_hits"] == 1
+    assert make_cache(tmp_path).stats()["disk_entries"] == entries
+
+def test_full_disk_tier_is_compacted_not_frozen(tmp_path):
+    cache = make_cache(tmp_path, max_disk_entries=4, memory_size=0)
+    cache.embed_documents(["old 1", "old 2", "current 1", "current 2"])
+
+    # An index build that still uses two of the texts, plus new ones
+    cache.embed_documents(["current 1", "current 2", "new 1", "new 2"])
+    stats = cache.stats()
+    assert stats["compactions"] == 1
+    assert stats["disk_entries"] == 4
+
+    model = CountingEmbeddings()
+    reader = make_cache(tmp_path, model, memory_size=0)
+    reader.embed_documents(["current 1", "current 2", "new 1", "new 2"])
+    assert model.calls == 0
+    reader.embed_documents(["old 1"])
+    assert model.calls == 1
+
+def test_readers_reload_after_compaction(tmp_path):
+    reader = make_cache(tmp_path, persist=False, memory_size=0)
+    writer = make_cache(tmp_path, max_disk_entries=2, memory_size=0)
+    writer.embed_documents(["a", "b"])
+    assert reader.embed_query("a") == writer.embed_query("a")
+
+    writer.embed_documents(["c", "d"])
+    model = CountingEmbeddings()
+    reader.embeddings = model
+    assert reader.embed_query("d") == writer.embed_query("d")
+    assert reader.embed_query("c") == writer.embed_query("c")
+    assert model.calls == 0
+
+def test_uncommitted_rows_are_ignored(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.embed_documents(["x"])
+    # A crash after writing data but before the commit leaves extra bytes
+    with open(cache.keys_path, 'ab') as f:
+        f.write(os.urandom(16))
+    assert make_cache(tmp_path).stats()["disk_entries"] == 1
@@ -0,0 +1,43 @@
+import numpy as np
+
+from embedding_engine import EmbeddingEngine
+
+class LengthModel:
+    """Encodes a text as [its length, its position in the batch]"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        if isinstance(texts, str):
+            return np.array([len(texts), 0.0])
+        self.batches.append(list(texts))
+        return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=float)
+
+def make_engine(**kwargs):
+    engine = EmbeddingEngine(model_name="fake", workers=1, **kwargs)
+    engine._model = LengthModel()
+    return engine
+
+def test_results_come_back_in_input_order():
+    engine = make_engine()
+    texts = ["bb", "a", "dddd", "ccc"]
+    vectors = engine.embed_documents(texts)
+    assert [vector[0] for vector in vectors] == [2, 1, 4, 3]
+
+def test_texts_are_encoded_longest_first():
+    engine = make_engine()
+    engine.embed_documents(["bb", "a", "dddd", "ccc"])
+    assert engine._model.batches == [["dddd", "ccc", "bb", "a"]]
+
+def test_large_inputs_are_encoded_in_progress_steps(monkeypatch):
+    monkeypatch.setattr(EmbeddingEngine, "PROGRESS_STEP", 2)
+    engine = make_engine()
+    vectors = engine.embed_documents(["a", "bbb", "cc", "dddd", "eeeee"])
+    assert [len(batch) for batch in engine._model.batches] == [2, 2, 1]
+    assert [vector[0] for vector in vectors] == [1, 3, 2, 4, 5]
+
+def test_empty_input_does_not_load_the_model():
+    engine = EmbeddingEngine(model_name="fake", workers=1)
+    assert engine.embed_documents([]) == []
+    assert engine._model is None
@@ -0,0 +1,58 @@
+import time
+
+from engine_startup import EngineStartup, PRELOAD_STAGES
+
+class FakeEngine:
+    def __init__(self, failures=None):
+        self.calls = []
+        self.failures = dict(failures or {})
+
+    def __getattr__(self, method):
+        def load():
+            self.calls.append(method)
+            if self.failures.get(method, 0):
+                self.failures[method] -= 1
+                raise RuntimeError(f"{method} unavailable")
+        return load
+
+def test_stages_load_after_what_they_need():
+    engine = FakeEngine()
+    startup = EngineStartup(engine, retry_interval=0, max_retry_interval=0)
+    startup.run()
+
+    assert startup.is_ready(*EngineStartup.STAGES)
+    assert engine.calls.index("load_vector_stores") > engine.calls.index("load_embeddings")
+    assert engine.calls.index("warm_up") > engine.calls.index("load_indexes")
+
+def test_failed_stage_is_retried_and_dependents_wait():
+    engine = FakeEngine(failures={"load_embeddings": 2})
+    startup = EngineStartup(engine, retry_interval=0.001, max_retry_interval=0.002)
+    startup.run()
+
+    stats = startup.stats()
+    assert stats["embeddings"]["attempts"] == 3
+    assert stats["embeddings"]["status"] == "ready"
+    assert stats["vector_stores"]["attempts"] == 1
+    assert engine.calls.count("load_llm") == 1
+
+def test_preload_leaves_the_other_stages_pending():
+    startup = EngineStartup(FakeEngine(), retry_interval=0)
+    startup.run(PRELOAD_STAGES)
+    assert startup.is_ready(*PRELOAD_STAGES)
+    assert startup.stats()["llm"]["status"] == "pending"
+    assert startup.stats()["vector_stores"]["status"] == "pending"
+
+def test_stop_ends_the_retries():
+    engine = FakeEngine(failures={"load_llm": 1000})
+    startup = EngineStartup(engine, retry_interval=0.01, max_retry_interval=0.01)
+    startup.start()
+    for _ in range(500):
+        if engine.calls.count("load_llm") >= 2:
+            break
+        time.sleep(0.01)
+    startup.stop()
+    startup._thread.join(timeout=5)
+
+    assert not startup._thread.is_alive()
+    assert startup.stats()["llm"]["status"] == "failed"
+    assert startup.stats()["llm"]["error"] == "load_llm unavailable"
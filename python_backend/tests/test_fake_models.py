@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+import numpy as np
+
+from benchmarks.fake_models import FakeLLM, HashEmbeddings
+
+def fast_llm():
+    return FakeLLM(latency=0, tokens_per_second=1e9)
+
+def test_faq_prompts_get_parseable_json():
+    llm = fast_llm()
+    pairs = json.loads(llm.invoke("Document Content:\nThe college offers B.Tech programs in computer engineering.\n\nGenerated Q&A Pairs:"))
+    assert pairs and all(set(pair) == {"question", "answer"} for pair in pairs)
+
+    variations = json.loads(llm.invoke("Original Question: What is the fee?\n\nParaphrased Questions:"))
+    assert len(variations) == 3 and all("What is the fee" in v for v in variations)
+
+def test_responses_are_deterministic_and_streams_match():
+    llm = fast_llm()
+    prompt = "Context:\nHostel rooms are shared by two students.\n\nAnswer:"
+    response = llm.invoke(prompt)
+    assert response == llm.invoke(prompt) == "Context: Hostel rooms are shared by two students."
+    assert "".join(llm.stream(prompt)) == response
+
+    async def astream():
+        return "".join([chunk async for chunk in llm.astream(prompt)])
+
+    assert asyncio.run(astream()) == response
+    assert asyncio.run(llm.ainvoke(prompt)) == response
+
+def test_hash_embeddings_are_unit_vectors_that_share_words():
+    embeddings = HashEmbeddings(dim=64)
+    fees, fees_again, hostel, empty = np.asarray(embeddings.embed_documents([
+        "Tuition fees, engineering", "engineering tuition fees", "hostel rooms", "???"
+    ]))
+    assert abs(np.linalg.norm(fees) - 1.0) < 1e-6
+    assert fees @ fees_again > 0.99
+    assert fees @ hostel < 0.5
+    assert abs(np.linalg.norm(empty) - 1.0) < 1e-6
+    assert embeddings.embed_query("hostel rooms") == hostel.tolist()
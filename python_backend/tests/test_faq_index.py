@@ -0,0 +1,69 @@
+import math
+import os
+
+import pytest
+
+from config import Config
+from faq_index import FAQAnswerStore, NumpyFAQIndex, relevance_scores
+
+IDS = ["faq_1_q", "faq_1_v0", "faq_2_q"]
+TEXTS = ["What is the fee?", "How much is the fee?", "Where is the campus?"]
+METADATAS = [
+    {"faq_id": "faq_1", "type": "main_question", "section": "fees"},
+    {"faq_id": "faq_1", "type": "variation", "section": "fees"},
+    {"faq_id": "faq_2", "type": "main_question", "section": "campus"},
+]
+EMBEDDINGS = [[2.0, 0.0, 0.0], [1.0, 1.0, 0.0], [0.0, 0.0, 3.0]]
+
+@pytest.fixture
+def index(tmp_path):
+    NumpyFAQIndex.save(IDS, TEXTS, METADATAS, EMBEDDINGS, directory=str(tmp_path))
+    index = NumpyFAQIndex(directory=str(tmp_path))
+    assert index.load()
+    return index
+
+def test_relevance_matches_chroma_l2_conversion():
+    queries = NumpyFAQIndex.normalized([[1.0, 0.0]], 1)
+    vectors = NumpyFAQIndex.normalized([[1.0, 0.0], [0.0, 1.0]], 2)
+    scores = relevance_scores(queries, vectors)
+    assert scores[0, 0] == pytest.approx(1.0)
+    assert scores[0, 1] == pytest.approx(1.0 - 2.0 / math.sqrt(2))
+
+def test_search_ranks_best_first(index):
+    hits = index.search_batch([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]], k=2)
+    assert [doc.page_content for doc, _ in hits[0]] == ["What is the fee?", "How much is the fee?"]
+    assert hits[0][0][1] > hits[0][1][1]
+    assert hits[1][0][0].metadata["faq_id"] == "faq_2"
+    assert len(index) == 3
+
+def test_threshold_and_sections_filter(index):
+    hits = index.search_batch([[1.0, 0.0, 0.0]], k=3, score_threshold=0.9)
+    assert [doc.page_content for doc, _ in hits[0]] == ["What is the fee?"]
+
+    hits = index.search_batch([[1.0, 0.0, 0.0]], k=3, sections=["campus"])
+    assert [doc.page_content for doc, _ in hits[0]] == ["Where is the campus?"]
+    assert index.search_batch([[1.0, 0.0, 0.0]], k=3, sections=["hostel"]) == [[]]
+
+def test_missing_files_do_not_load(tmp_path):
+    index = NumpyFAQIndex(directory=str(tmp_path))
+    assert not index.load()
+    assert index.search_batch([[1.0, 0.0, 0.0]], k=1) == [[]]
+
+def test_reloads_a_re_exported_index(index, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_CHECK_INTERVAL", 0)
+    NumpyFAQIndex.save(IDS[:1], TEXTS[:1], METADATAS[:1], EMBEDDINGS[:1], directory=str(tmp_path))
+    index.search_batch([[1.0, 0.0, 0.0]], k=3)
+    assert len(index) == 1
+
+def test_answer_store_reads_saved_answers(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CACHE_CHECK_INTERVAL", 0)
+    path = str(tmp_path / "faq_answers.json")
+    store = FAQAnswerStore(path)
+    assert store.get("faq_1") is None
+
+    FAQAnswerStore.save({"faq_1": "1 lakh"}, path)
+    assert store.get("faq_1") == "1 lakh"
+
+    FAQAnswerStore.save({"faq_1": "1.2 lakh"}, path)
+    assert store.get("faq_1") == "1.2 lakh"
+    assert not os.path.exists(f"{path}.tmp")
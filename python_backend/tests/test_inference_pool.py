@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+from inference_pool import InferencePool, PoolSaturatedError
+
+def test_run_returns_the_result():
+    pool = InferencePool("test", max_workers=2, max_queue=2)
+    assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+def test_sheds_when_workers_and_queue_are_full():
+    pool = InferencePool("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+def test_cancelled_call_keeps_its_slot_until_the_thread_finishes():
+    pool = InferencePool("test", max_workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait()
+
+    async def main():
+        task = asyncio.ensure_future(pool.run(blocking))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        # The thread is still running, so the pool is still full
+        assert pool.pending == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(sum, [])
+
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert await pool.run(sum, [1]) == 1
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+    pool.shutdown()
+
+def test_cancelled_before_starting_releases_its_slot():
+    pool = InferencePool("test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(pool.run(release.wait))
+        queued = asyncio.ensure_future(pool.run(sum, []))
+        await asyncio.sleep(0.05)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        release.set()
+        await running
+        await asyncio.sleep(0.05)
+        assert pool.pending == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()
+    pool.shutdown()
+
+def test_run_async_limits_concurrency():
+    pool = InferencePool("test", max_workers=2, max_queue=10)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    async def main():
+        await asyncio.gather(*(pool.run_async(call) for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert pool.stats()["completed"] == 6
@@ -0,0 +1,49 @@
+import time
+
+from llm_cache import CachedChain, LLMResponseCache
+
+class CountingChain:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, inputs):
+        self.calls += 1
+        return f"response {self.calls}"
+
+def test_key_depends_on_every_part():
+    base = ("Summarize {text}", "model-a", {"temperature": 0.7}, {"text": "fees"})
+    key = LLMResponseCache.make_key(*base)
+    assert key == LLMResponseCache.make_key(*base)
+    assert key != LLMResponseCache.make_key("Rewrite {text}", *base[1:])
+    assert key != LLMResponseCache.make_key(base[0], "model-b", *base[2:])
+    assert key != LLMResponseCache.make_key(*base[:2], {"temperature": 0.1}, base[3])
+    assert key != LLMResponseCache.make_key(*base[:3], {"text": "hostel"})
+
+def test_cached_chain_calls_the_llm_once(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"))
+    chain = CountingChain()
+    cached = CachedChain("Summarize {text}", chain, cache, "model-a", {})
+
+    assert cached.invoke({"text": "fees"}) == "response 1"
+    assert cached.invoke({"text": "fees"}) == "response 1"
+    assert cached.invoke({"text": "hostel"}) == "response 2"
+    assert chain.calls == 2
+    assert cache.stats()["hits"] == 1
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMResponseCache(path).put("key", "stored")
+    assert LLMResponseCache(path).get("key") == "stored"
+
+def test_evicts_expired_and_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+        time.sleep(0.01)
+    cache.get("a")
+    cache.evict()
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+
+    expired = LLMResponseCache(str(tmp_path / "llm.sqlite"), max_age_days=0)
+    assert expired.stats()["size"] == 0
@@ -0,0 +1,79 @@
+import os
+
+from metrics import Metrics, render_family
+
+def test_counters_and_histograms_render_in_text_format():
+    m = Metrics(enabled=True, buckets=(0.1, 1.0), directory="")
+    m.increment("urag_answers_total", tier="faq")
+    m.increment("urag_answers_total", tier="faq")
+    m.observe("urag_stage_duration_seconds", 0.05, stage="embedding")
+    m.observe("urag_stage_duration_seconds", 2.0, stage="embedding")
+    body = m.render()
+
+    assert "# TYPE urag_answers_total counter" in body
+    assert 'urag_answers_total{tier="faq"} 2' in body
+    assert 'urag_stage_duration_seconds_bucket{stage="embedding",le="0.1"} 1' in body
+    assert 'urag_stage_duration_seconds_bucket{stage="embedding",le="1.0"} 1' in body
+    assert 'urag_stage_duration_seconds_bucket{stage="embedding",le="+Inf"} 2' in body
+    assert 'urag_stage_duration_seconds_count{stage="embedding"} 2' in body
+    assert 'urag_stage_duration_seconds_sum{stage="embedding"} 2.05' in body
+
+def test_span_times_a_block():
+    m = Metrics(enabled=True, directory="")
+    with m.span("faq_search"):
+        pass
+    [(labels, count, total)] = m.totals("urag_stage_duration_seconds")
+    assert labels == {"stage": "faq_search"} and count == 1 and total >= 0
+
+def test_disabled_records_nothing():
+    m = Metrics(enabled=False, directory="")
+    with m.span("embedding"):
+        m.increment("urag_answers_total", tier="faq")
+        m.observe("urag_http_request_duration_seconds", 0.1, endpoint="/", status="200")
+    assert m.render() == ""
+
+def test_reset():
+    m = Metrics(enabled=True, directory="")
+    m.increment("urag_answers_total", tier="faq")
+    m.reset()
+    assert m.render() == ""
+
+def test_render_family():
+    body = render_family("urag_pool_active", "gauge", "Calls running", [({"pool": "retrieval"}, 3)])
+    assert body == '# HELP urag_pool_active Calls running\n# TYPE urag_pool_active gauge\nurag_pool_active{pool="retrieval"} 3\n'
+
+def test_workers_sharing_a_directory_are_summed(tmp_path):
+    directory = str(tmp_path)
+    worker_a = Metrics(enabled=True, buckets=(1.0,), directory=directory)
+    worker_b = Metrics(enabled=True, buckets=(1.0,), directory=directory)
+    worker_a.clear_directory()
+
+    worker_a.increment("urag_answers_total", tier="faq")
+    worker_b.increment("urag_answers_total", tier="faq", value=2)
+    worker_b.observe("urag_stage_duration_seconds", 0.5, stage="embedding")
+    worker_b.flush()  # its periodic flush; a scrape flushes only the worker answering it
+
+    for worker in (worker_a, worker_b):
+        body = worker.render()
+        assert 'urag_answers_total{tier="faq"} 3' in body
+        assert 'urag_stage_duration_seconds_count{stage="embedding"} 1' in body
+
+def test_exited_worker_counts_are_kept(tmp_path):
+    directory = str(tmp_path)
+    exited = Metrics(enabled=True, directory=directory)
+    exited.increment("urag_answers_total", tier="document", value=5)
+    exited.flush()
+    del exited
+
+    replacement = Metrics(enabled=True, directory=directory)
+    replacement.increment("urag_answers_total", tier="document")
+    assert 'urag_answers_total{tier="document"} 6' in replacement.render()
+    assert len(os.listdir(directory)) == 2
+
+def test_clear_directory_removes_old_snapshots(tmp_path):
+    m = Metrics(enabled=True, directory=str(tmp_path))
+    m.increment("urag_answers_total", tier="faq")
+    m.flush()
+    m.reset()
+    m.clear_directory()
+    assert m.render() == ""
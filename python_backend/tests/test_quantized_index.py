@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from quantized_index import NumpyDocIndex, QuantizedDocIndex
+
+COUNT, DIM = 200, 32
+
+@pytest.fixture
+def snapshot(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(COUNT, DIM)).astype(np.float32)
+    ids = [f"doc_{i}" for i in range(COUNT)]
+    metadatas = [{"doc_id": id_, "section": "fees" if i % 2 else "admissions"} for i, id_ in enumerate(ids)]
+    QuantizedDocIndex.save(ids, ids, metadatas, embeddings.tolist(), directory=str(tmp_path))
+    return str(tmp_path), embeddings
+
+def load(directory, mode, rescore_factor=10):
+    index = QuantizedDocIndex(mode=mode, directory=directory, rescore_factor=rescore_factor)
+    assert index.load()
+    return index
+
+def test_int8_codes_reconstruct_the_vectors():
+    vectors = NumpyDocIndex.normalized(np.random.default_rng(1).normal(size=(50, 16)), 50)
+    codes, scales = QuantizedDocIndex.quantize_int8(vectors)
+    assert codes.dtype == np.int8
+    assert np.abs(codes * scales - vectors).max() < scales.max()
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_scores_are_exact_and_top_hit_matches_float32(snapshot, mode):
+    directory, embeddings = snapshot
+    exact = NumpyDocIndex(directory=directory)
+    assert exact.load()
+    quantized = load(directory, mode)
+
+    queries = embeddings[:5] + np.random.default_rng(2).normal(scale=0.1, size=(5, DIM))
+    expected = exact.search_batch(queries.tolist(), k=3)
+    found = quantized.search_batch(queries.tolist(), k=3)
+    for expected_hits, hits in zip(expected, found):
+        assert hits[0][0].page_content == expected_hits[0][0].page_content
+        assert hits[0][1] == pytest.approx(expected_hits[0][1], abs=1e-5)
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_section_filter(snapshot, mode):
+    directory, embeddings = snapshot
+    hits = load(directory, mode).search_batch([embeddings[1].tolist()], k=5, sections=["fees"])[0]
+    assert hits[0][0].page_content == "doc_1"
+    assert all(doc.metadata["section"] == "fees" for doc, _ in hits)
+
+def test_codes_are_smaller_than_float32(snapshot):
+    directory, _ = snapshot
+    float_bytes = COUNT * DIM * 4
+    assert load(directory, "int8").memory_bytes() <= float_bytes // 4 + DIM * 4
+    assert load(directory, "binary").memory_bytes() == float_bytes // 32
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        QuantizedDocIndex(mode="int4", directory=str(tmp_path))
@@ -0,0 +1,74 @@
+import time
+
+from langchain_core.documents import Document
+
+from reranker import Reranker
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words the chunk contains"""
+
+    def __init__(self, seconds_per_pair=0.0):
+        self.seconds_per_pair = seconds_per_pair
+        self.pairs = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=None):
+        time.sleep(self.seconds_per_pair * len(pairs))
+        self.pairs += len(pairs)
+        return [float(sum(word in chunk for word in query.split())) for query, chunk in pairs]
+
+def candidates(*texts):
+    return [(Document(page_content=text), 0.9 - i / 100) for i, text in enumerate(texts)]
+
+def make_reranker(model, **kwargs):
+    reranker = Reranker(**kwargs)
+    reranker._model = model
+    return reranker
+
+def test_reorders_by_cross_encoder_score_and_keeps_relevance():
+    reranker = make_reranker(FakeCrossEncoder())
+    docs = candidates("campus canteen menu", "hostel fees per year", "hostel rooms")
+    ranked = reranker.rerank("hostel fees", docs)
+
+    assert [doc.page_content for doc, _ in ranked] == ["hostel fees per year", "hostel rooms", "campus canteen menu"]
+    assert dict((doc.page_content, score) for doc, score in ranked) == dict((doc.page_content, score) for doc, score in docs)
+
+def test_scores_are_cached_per_question_and_chunk():
+    model = FakeCrossEncoder()
+    reranker = make_reranker(model)
+    docs = candidates("a b", "b c")
+    reranker.rerank("b", docs)
+    reranker.rerank("  B ", docs)
+
+    assert model.pairs == 2
+    assert reranker.stats()["cache_hits"] == 2
+
+def test_budget_limits_pairs_scored():
+    reranker = make_reranker(FakeCrossEncoder(), budget_ms=10)
+    reranker._ms_per_pair = 4.0
+    ranked = reranker.rerank("x", candidates("one", "two", "x three", "x four"))
+
+    assert reranker.stats()["pairs_scored"] == 2
+    assert reranker.stats()["pairs_skipped"] == 2
+    assert len(ranked) == 4
+
+def test_recovers_after_a_slow_batch():
+    model = FakeCrossEncoder(seconds_per_pair=0.05)
+    reranker = make_reranker(model, budget_ms=10)
+    reranker.rerank("q0", candidates("a", "b"))
+    assert reranker.stats()["ms_per_pair"] > 10
+
+    model.seconds_per_pair = 0.0
+    for n in range(1, 40):
+        reranker.rerank(f"q{n}", candidates("a", "b", "c"))
+    before = reranker.stats()["pairs_scored"]
+    reranker.rerank("final", candidates("a", "b", "c"))
+
+    assert reranker.stats()["pairs_scored"] - before == 3
+
+def test_model_errors_keep_first_stage_order():
+    class Broken:
+        def predict(self, *args, **kwargs):
+            raise RuntimeError("model unavailable")
+
+    docs = candidates("a", "b")
+    assert make_reranker(Broken()).rerank("q", docs) == docs
@@ -0,0 +1,31 @@
+import pytest
+
+from config import Config
+from section_router import SectionRouter
+
+METADATAS = [{"section": "fees"}, {"section": "fees"}, {"section": "facilities"}, {"section": "general"}, {"section": "placements"}]
+EMBEDDINGS = [[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 1.0, 0.0], [0.3, 0.3, 0.3], [0.0, 0.0, 1.0]]
+
+@pytest.fixture
+def router(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SECTION_CENTROID_MARGIN", 0.05)
+    path = str(tmp_path / "sections.json")
+    SectionRouter.save(METADATAS, EMBEDDINGS, path=path)
+    return SectionRouter(path)
+
+def test_keywords_route_to_their_section_plus_catch_all(router):
+    assert router.predict("What is the tuition fee?", [0.0, 0.0, 1.0]) == ["fees", "general"]
+    assert router.predict("Is there a hostel and what are the fees?", [0.0, 0.0, 1.0]) == ["facilities", "fees", "general"]
+
+def test_nearest_centroid_without_keywords(router):
+    assert router.predict("Which firms visit?", [0.0, 0.0, 1.0]) == ["general", "placements"]
+
+def test_no_narrowing_is_unrouted(router):
+    query = "hostel fees placement companies"
+    assert router.predict(query, [1.0, 0.0, 0.0]) is None
+    assert router.stats()["unrouted"] == 1
+
+def test_without_centroids_nothing_is_routed(tmp_path):
+    router = SectionRouter(str(tmp_path / "missing.json"))
+    assert router.predict("What is the fee?", [1.0, 0.0, 0.0]) is None
+    assert router.stats()["sections"] == []
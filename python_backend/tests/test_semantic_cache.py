@@ -0,0 +1,44 @@
+import json
+
+from config import Config
+from semantic_cache import SemanticCache
+
+RESULT = {"type": "document", "content": "Admissions open in June.", "confidence": 0.8}
+
+def test_paraphrase_within_distance_hits(workdir):
+    cache = SemanticCache(max_size=4, max_age=60, max_distance=0.05)
+    cache.add([1.0, 0.0, 0.0], RESULT)
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == RESULT
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_scale_does_not_matter(workdir):
+    cache = SemanticCache(max_size=4, max_age=60, max_distance=0.01)
+    cache.add([2.0, 0.0], RESULT)
+    assert cache.lookup([10.0, 0.0]) == RESULT
+
+def test_full_cache_evicts_least_recently_used(workdir):
+    cache = SemanticCache(max_size=2, max_age=60, max_distance=0.01)
+    cache.add([1.0, 0.0, 0.0], dict(RESULT, content="x"))
+    cache.add([0.0, 1.0, 0.0], dict(RESULT, content="y"))
+    cache.lookup([1.0, 0.0, 0.0])
+    cache.add([0.0, 0.0, 1.0], dict(RESULT, content="z"))
+
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.lookup([1.0, 0.0, 0.0])["content"] == "x"
+    assert cache.lookup([0.0, 0.0, 1.0])["content"] == "z"
+
+def test_expired_entries_are_not_served(workdir):
+    cache = SemanticCache(max_size=2, max_age=0, max_distance=0.01)
+    cache.add([1.0, 0.0], RESULT)
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.stats()["size"] == 0
+
+def test_forgets_answers_when_index_data_changes(workdir):
+    cache = SemanticCache(max_size=2, max_age=60, max_distance=0.01, check_interval=0)
+    cache.add([1.0, 0.0], RESULT)
+    with open(Config.ENRICHED_FAQS_FILE, 'w', encoding='utf-8') as f:
+        json.dump([], f)
+    assert cache.lookup([1.0, 0.0]) is None
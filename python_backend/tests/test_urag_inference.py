@@ -0,0 +1,238 @@
+import asyncio
+import gc
+import math
+import os
+import threading
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models.fake import FakeListLLM, FakeStreamingListLLM
+
+from bm25_index import BM25Index
+from config import Config
+from inference_pool import InferencePool, PoolSaturatedError
+from urag_inference import URAGInference
+
+FAQ_HIT = (Document(page_content="What is the fee?", metadata={"faq_id": "faq_1", "answer": "1 lakh"}), 0.95)
+
+def make_engine(faq_delay: float = 0.0) -> URAGInference:
+    engine = URAGInference(load=False)
+    engine._embed_query = lambda query: [1.0, 0.0]
+
+    def retrieve_faqs(query_embedding):
+        threading.Event().wait(faq_delay)
+        return [FAQ_HIT]
+
+    engine.retrieve_faqs = retrieve_faqs
+    engine.retrieve_document_candidates = lambda query_embedding, query=None: []
+    return engine
+
+def test_abandoned_speculative_failure_is_not_logged(workdir):
+    # Documents come back first with nothing relevant, so the fallback starts and
+    # is shed; the FAQ hit then makes it unnecessary and nobody awaits it
+    engine = make_engine(faq_delay=0.1)
+    errors = []
+
+    async def shed(fn, *args):
+        raise PoolSaturatedError("llm pool is at capacity")
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        result = await engine.aquery_speculative("What is the fee?", run_generation=shed)
+        await asyncio.sleep(0)
+        gc.collect()
+        return result
+
+    result = asyncio.run(main())
+    assert result["type"] == "faq"
+    assert errors == []
+
+def test_speculative_retrieval_goes_through_the_pool(workdir):
+    engine = make_engine()
+    pool = InferencePool("retrieval", max_workers=2, max_queue=2)
+
+    result = asyncio.run(engine.aquery_speculative("What is the fee?", run_blocking=pool.run))
+    assert result["type"] == "faq"
+    # The query embedding, FAQ search and document search
+    assert pool.stats()["completed"] == 3
+    assert pool.pending == 0
+    pool.shutdown()
+
+def make_batch_engine() -> URAGInference:
+    engine = make_engine()
+    engine.route_batch = lambda user_queries: [
+        dict(engine._new_route(query, [1.0, 0.0]), tier="faq", faq_hits=[FAQ_HIT]) for query in user_queries
+    ]
+    return engine
+
+def test_batch_routing_goes_through_the_pool(workdir):
+    engine = make_batch_engine()
+    pool = InferencePool("retrieval", max_workers=1, max_queue=0)
+
+    results = asyncio.run(engine.aquery_batch(["What is the fee?", "what is the fee"], run_blocking=pool.run))
+    assert [result["faq_id"] for result in results] == ["faq_1", "faq_1"]
+    assert pool.stats()["completed"] == 1
+    pool.shutdown()
+
+def test_batch_is_shed_when_the_pool_is_full(workdir):
+    engine = make_batch_engine()
+    pool = InferencePool("retrieval", max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def main():
+        busy = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        try:
+            await engine.aquery_batch(["What is the fee?"], run_blocking=pool.run)
+        except PoolSaturatedError:
+            return True
+        finally:
+            release.set()
+            await busy
+        return False
+
+    try:
+        assert asyncio.run(main())
+    finally:
+        release.set()
+    assert pool.stats()["rejected"] == 1
+    pool.shutdown()
+
+class StoredChunks:
+    """Stands in for the Chroma collection lexical-only chunks are fetched from"""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def get(self, ids, include):
+        return {
+            "ids": ids,
+            "documents": [f"text of {id_}" for id_ in ids],
+            "metadatas": [{"doc_id": id_} for id_ in ids],
+            "embeddings": [self.embeddings[id_] for id_ in ids]
+        }
+
+def test_rrf_fusion_adds_lexical_matches_with_vector_scores(workdir, monkeypatch):
+    monkeypatch.setattr(Config, "RRF_K", 60)
+    os.makedirs(Config.VECTOR_STORE_DIR)
+    BM25Index.save(["doc_a", "doc_b", "doc_c"], ["general admission info", "MHT-CET cutoff list", "hostel cutoff"])
+    engine = URAGInference(load=False)
+
+    class Store:
+        _collection = StoredChunks({"doc_b": [0.0, 1.0]})
+
+    engine.doc_vectorstore = Store()
+    vector_hits = [
+        (Document(page_content="a", metadata={"doc_id": "doc_a"}), 0.9),
+        (Document(page_content="c", metadata={"doc_id": "doc_c"}), 0.8),
+    ]
+
+    # doc_c is in both rankings; doc_a and doc_b are each first in one of them
+    fused = engine._fuse_lexical("MHT-CET cutoff", [1.0, 0.0], vector_hits, limit=3)
+    assert fused[0][0].metadata["doc_id"] == "doc_c"
+    assert {doc.metadata["doc_id"] for doc, _ in fused[1:]} == {"doc_a", "doc_b"}
+
+    # Vector scores are kept; the BM25-only chunk is scored against its stored embedding
+    scores = {doc.metadata["doc_id"]: score for doc, score in fused}
+    assert scores["doc_a"] == 0.9
+    assert scores["doc_b"] == pytest.approx(1.0 - 2.0 / math.sqrt(2))
+
+    assert [doc.metadata["doc_id"] for doc, _ in engine._fuse_lexical("MHT-CET cutoff", [1.0, 0.0], vector_hits, limit=1)] == ["doc_c"]
+
+def test_hybrid_confidence_ignores_context_chunks_below_the_threshold(workdir, monkeypatch):
+    monkeypatch.setattr(Config, "HYBRID_SEARCH", True)
+    monkeypatch.setattr(Config, "DOC_THRESHOLD", 0.8)
+    monkeypatch.setattr(Config, "DOC_LIMIT", 3)
+    candidates = [
+        (Document(page_content="b", metadata={"doc_id": "doc_b"}), 1.0 - 2.0 / math.sqrt(2)),
+        (Document(page_content="a", metadata={"doc_id": "doc_a"}), 0.9),
+        (Document(page_content="c", metadata={"doc_id": "doc_c"}), 0.5),
+    ]
+
+    # Fused order is kept for the context, but only doc_a counts toward confidence
+    hits = URAGInference._document_hits(candidates)
+    assert [doc.metadata["doc_id"] for doc, _ in hits] == ["doc_b", "doc_a", "doc_c"]
+    result = URAGInference(load=False)._document_result("answer", hits)
+    assert result["confidence"] == pytest.approx(0.9)
+    assert result["document_ids"] == ["doc_b", "doc_a", "doc_c"]
+
+DOC_HIT = (Document(page_content="Admissions open in June.", metadata={"doc_id": "doc_1", "url": "https://college.example/admissions"}), 0.8)
+
+def make_routing_engine(faq_hits, doc_hits, llm=None) -> URAGInference:
+    engine = URAGInference(llm=llm or FakeListLLM(responses=["Generated answer."]), load=False)
+    engine.load_llm()
+    engine._embed_query = lambda query: [1.0, 0.0]
+    engine.retrieve_faqs = lambda query_embedding: list(faq_hits)
+    engine.retrieve_documents = lambda query_embedding, query=None: list(doc_hits)
+    return engine
+
+@pytest.mark.parametrize("faq_hits, doc_hits, tier", [
+    ([FAQ_HIT], [DOC_HIT], "faq"),
+    ([], [DOC_HIT], "document"),
+    ([], [], "fallback"),
+])
+def test_route_picks_the_first_tier_with_hits(workdir, faq_hits, doc_hits, tier):
+    engine = make_routing_engine(faq_hits, doc_hits)
+    assert engine.route("When do admissions open?")["tier"] == tier
+    assert engine.query("When do admissions open?")["type"] == tier
+
+def test_query_embeds_once_and_prompts_with_the_retrieved_chunks(workdir):
+    prompts = []
+
+    class RecordingLLM(FakeListLLM):
+        def _call(self, prompt, *args, **kwargs):
+            prompts.append(prompt)
+            return super()._call(prompt, *args, **kwargs)
+
+    engine = make_routing_engine([], [DOC_HIT], llm=RecordingLLM(responses=["In June."]))
+    embedded = []
+    engine._embed_query = lambda query: embedded.append(query) or [1.0, 0.0]
+
+    result = engine.query("When do admissions open?")
+    assert embedded == ["When do admissions open?"]
+    assert "Admissions open in June." in prompts[0]
+    assert result["sources"] == ["https://college.example/admissions"]
+
+def test_generated_answers_are_reused_for_the_same_embedding(workdir):
+    engine = make_routing_engine([], [DOC_HIT])
+    first = engine.query("When do admissions open?")
+    route = engine.route("when does admission start")
+    assert route["tier"] == "cached"
+    assert engine.answer(route)["content"] == first["content"]
+
+def test_stream_sends_meta_tokens_and_done(workdir):
+    llm = FakeStreamingListLLM(responses=["Apply online."])
+    engine = make_routing_engine([], [], llm=llm)
+
+    async def collect():
+        route = await engine.aroute("How do I apply?")
+        return [event async for event in engine.astream_answer(route)]
+
+    events = asyncio.run(collect())
+    names = [event["event"] for event in events]
+    assert names[0] == "meta" and names[-1] == "done"
+    assert events[0]["data"]["type"] == "fallback"
+
+    text = "".join(event["data"]["text"] for event in events if event["event"] == "token")
+    assert text == "Apply online." + URAGInference.FALLBACK_DISCLAIMER
+    assert engine.answer_cache.get("How do I apply?")["content"] == text
+
+def test_stream_of_faq_hit_is_one_answer_event(workdir):
+    engine = make_routing_engine([FAQ_HIT], [])
+
+    async def collect():
+        route = await engine.aroute("What is the fee?")
+        return [event async for event in engine.astream_answer(route)]
+
+    events = asyncio.run(collect())
+    assert [event["event"] for event in events] == ["answer"]
+    assert events[0]["data"]["content"] == "1 lakh"
+
+def test_speculative_aquery_checks_the_answer_cache_once(workdir, monkeypatch):
+    monkeypatch.setattr(Config, "SPECULATIVE_TIERS", True)
+    engine = make_engine()
+
+    assert asyncio.run(engine.aquery("What is the fee?"))["type"] == "faq"
+    assert asyncio.run(engine.aquery("What is the fee?"))["type"] == "faq"
+    stats = engine.answer_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
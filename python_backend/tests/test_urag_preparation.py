@@ -0,0 +1,103 @@
+import json
+import os
+
+from langchain_core.language_models.fake import FakeListLLM
+
+from config import Config
+from urag_preparation import URAGPreparation
+
+PARAGRAPH = "The college offers engineering programs with laboratories, libraries and hostels for students. " * 4
+
+def firecrawl_page(url, text=PARAGRAPH):
+    """Shaped like firecrawl crawl output: the URL only in metadata.sourceURL"""
+    return {"markdown": text, "metadata": {"sourceURL": url, "title": url.rsplit("/", 1)[-1]}}
+
+def write_pages(pages):
+    with open(Config.COLLEGE_DATA_FILE, 'w', encoding='utf-8') as f:
+        json.dump(pages, f)
+
+def make_prep():
+    return URAGPreparation(llm=FakeListLLM(responses=["Rewritten text about the college."]), embeddings=object())
+
+def test_firecrawl_pages_keyed_by_source_url(workdir):
+    write_pages([
+        firecrawl_page("https://college.example/admissions"),
+        firecrawl_page("https://college.example/fees", PARAGRAPH + "Fees."),
+        firecrawl_page("https://college.example/hostel", PARAGRAPH + "Hostel."),
+    ])
+    prep = make_prep()
+    docs = prep.urag_d_augment_documents()
+
+    assert prep.last_changes["added"] == 3
+    urls = {doc["metadata"]["url"] for doc in docs}
+    assert urls == {"https://college.example/admissions", "https://college.example/fees", "https://college.example/hostel"}
+    assert {doc["metadata"]["section"] for doc in docs} >= {"admissions", "fees"}
+
+def test_pages_without_url_are_not_deduplicated(workdir):
+    write_pages([
+        {"markdown": PARAGRAPH + "One."},
+        {"markdown": PARAGRAPH + "Two."},
+        {"markdown": PARAGRAPH + "Three."},
+    ])
+    prep = make_prep()
+    docs = prep.urag_d_augment_documents()
+
+    assert prep.last_changes["added"] == 3
+    assert len({doc["metadata"]["source"] for doc in docs}) == 3
+    assert all(doc["metadata"]["source"] for doc in docs)
+
+def test_unchanged_pages_are_reused(workdir):
+    write_pages([firecrawl_page("https://college.example/admissions")])
+    make_prep().urag_d_augment_documents()
+
+    prep = make_prep()
+    prep.urag_d_augment_documents()
+    assert prep.last_changes == {"added": 0, "changed": 0, "unchanged": 1, "removed": 0}
+
+def test_injected_llm_does_not_share_the_configured_models_cache(workdir):
+    write_pages([firecrawl_page("https://college.example/admissions")])
+    fake = make_prep()
+    assert fake.llm_model != Config.LLM_MODEL
+    fake.urag_d_augment_documents()
+
+    # Same prompts and inputs, different LLM: nothing may come from the fake's cache entries
+    other = URAGPreparation(llm=FakeListLLM(responses=["A different model's answer."]), embeddings=object())
+    os.remove(Config.AUGMENTED_DOCS_FILE)
+    docs = other.urag_d_augment_documents()
+
+    assert other.llm_cache.stats()["hits"] == 0
+    assert all("different model" in doc["augmented_content"] for doc in docs)
+
+def test_interrupted_run_resumes_from_checkpoint(workdir, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 0)
+    write_pages([
+        firecrawl_page("https://college.example/admissions"),
+        firecrawl_page("https://college.example/hostel", PARAGRAPH + "Hostel."),
+    ])
+
+    first = make_prep()
+    extract = first._extract_context
+
+    def fail_on_hostel(content):
+        if "Hostel." in content:
+            raise RuntimeError("model overloaded")
+        return extract(content)
+
+    first._extract_context = fail_on_hostel
+    first.urag_d_augment_documents()
+    assert os.path.exists(Config.AUGMENT_CHECKPOINT_FILE)
+
+    # Crash before augmented_docs.json was written, with a torn last checkpoint line
+    os.remove(Config.AUGMENTED_DOCS_FILE)
+    with open(Config.AUGMENT_CHECKPOINT_FILE, 'a', encoding='utf-8') as f:
+        f.write('{"source": "https://college.example/fe')
+
+    second = make_prep()
+    extracted = []
+    extract = second._extract_context
+    second._extract_context = lambda content: extracted.append(content) or extract(content)
+    docs = second.urag_d_augment_documents()
+
+    assert len(extracted) == 1 and "Hostel." in extracted[0]
+    assert {doc["metadata"]["url"] for doc in docs} == {"https://college.example/admissions", "https://college.example/hostel"}
+    assert not os.path.exists(Config.AUGMENT_CHECKPOINT_FILE)
@@ -0,0 +1,59 @@
+import json
+
+from langchain_core.embeddings import Embeddings
+
+from config import Config
+from vector_indexing import VectorIndexer
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded += texts
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+def write_faqs(faqs):
+    with open(Config.ENRICHED_FAQS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(faqs, f)
+
+def faq(id_, question, variations=()):
+    return {"id": id_, "question": question, "answer": f"Answer to {question}", "variations": list(variations)}
+
+def stored_ids(vectorstore):
+    return sorted(vectorstore._collection.get()["ids"])
+
+def test_faq_sync_embeds_only_new_texts(workdir):
+    embeddings = CountingEmbeddings()
+    indexer = VectorIndexer(embeddings=embeddings)
+
+    write_faqs([faq("faq_1", "What is the fee?", ["How much is the fee?"]), faq("faq_2", "Where is the campus?")])
+    indexer.create_faq_index()
+    assert len(embeddings.embedded) == 3
+
+    # Unchanged: nothing is embedded again
+    embeddings.embedded.clear()
+    indexer.create_faq_index()
+    assert embeddings.embedded == []
+
+    # One question changed, one FAQ removed, a variation dropped
+    write_faqs([faq("faq_1", "What is the tuition fee?")])
+    vectorstore = indexer.create_faq_index()
+    assert embeddings.embedded == ["What is the tuition fee?"]
+    assert stored_ids(vectorstore) == ["faq_1_q"]
+
+def test_renumbered_faq_keeps_its_embedding(workdir):
+    embeddings = CountingEmbeddings()
+    indexer = VectorIndexer(embeddings=embeddings)
+
+    write_faqs([faq("faq_1", "What is the fee?")])
+    indexer.create_faq_index()
+    embeddings.embedded.clear()
+
+    write_faqs([faq("faq_7", "What is the fee?")])
+    vectorstore = indexer.create_faq_index()
+    assert embeddings.embedded == []
+    assert stored_ids(vectorstore) == ["faq_7_q"]
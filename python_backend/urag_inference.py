@@ -3,87 +3,223 @@ Step 4: URAG Inference Engine
 Implements the two-tier search with fallback mechanism
 """
 
+import asyncio
 import json
 import os
-from typing import Dict, Any, Optional, List
+import numpy as np
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable, AsyncIterator
 from langchain_community.vectorstores import Chroma
 from langchain_huggingface import HuggingFaceEndpoint, HuggingFaceEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseLanguageModel
 from config import Config
+from answer_cache import AnswerCache, normalize_query
+from semantic_cache import SemanticCache
+from bm25_index import BM25Index
+from embedding_cache import CachedEmbeddings
+from faq_index import FAQAnswerStore, NumpyFAQIndex, relevance_scores
+from quantized_index import NumpyDocIndex, QuantizedDocIndex
+from reranker import Reranker
+from section_router import SectionRouter
+from metrics import metrics
+
+def _discard_outcome(task: asyncio.Future):
+    """Mark an abandoned task's exception as retrieved, so asyncio does not log it"""
+    if not task.cancelled():
+        task.exception()
 
 class URAGInference:
-    def __init__(self):
-        # Initialize components
-        os.environ["HUGGINGFACEHUB_API_TOKEN"] = Config.HUGGINGFACEHUB_API_TOKEN
+    # Confidence reported when the LLM itself is unavailable
+    UNAVAILABLE_CONFIDENCE = 0.1
 
-        self.llm = HuggingFaceEndpoint(
-            repo_id=Config.LLM_MODEL,
-            huggingfacehub_api_token=Config.HUGGINGFACEHUB_API_TOKEN,
-            temperature=0.7,
-            top_p=0.95,
-            max_new_tokens=512
-        )
+    FALLBACK_DISCLAIMER = "\n\n*Disclaimer: This is a general response. Please verify with official college sources for the most current and accurate information.*"
 
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=Config.EMBEDDING_MODEL
-        )
+    def __init__(
+        self,
+        llm: Optional[BaseLanguageModel] = None,
+        embeddings: Optional[Embeddings] = None,
+        load: bool = True
+    ):
+        """
+        llm and embeddings default to the models named in Config. With
+        load=False only in-memory state is set up, and the caller runs
+        load_embeddings(), load_indexes(), load_vector_stores(), warm_up()
+        and load_llm() itself (see engine_startup.py).
+        """
+        os.environ["HUGGINGFACEHUB_API_TOKEN"] = Config.HUGGINGFACEHUB_API_TOKEN
 
-        # Load vector stores
+        self.llm = llm
+        self.embeddings = embeddings
+        self.rag_chain = None
+        self.fallback_chain = None
+
+        # Vector stores and their in-memory alternatives, filled in by load_vector_stores() and load_indexes()
         self.faq_vectorstore = None
         self.doc_vectorstore = None
-        self.faq_retriever = None
-        self.doc_retriever = None
-        self._load_vector_stores()
+        self.faq_index = None  # in-memory alternative to faq_vectorstore (FAQ_BACKEND="numpy")
+        self.doc_index = None  # alternative to doc_vectorstore (DOC_BACKEND="numpy" or DOC_QUANTIZATION)
+        self.faq_answers = FAQAnswerStore()
+        self.bm25_index = BM25Index()  # loaded on first hybrid search
+        self.reranker = Reranker()  # model loaded on first re-rank
+        self.section_router = SectionRouter()
 
-        # Setup retrievers
-        self._setup_retrievers()
+        # Exact-match cache in front of the whole pipeline
+        self.answer_cache = AnswerCache()
 
-        # Setup chains
-        self._setup_chains()
+        # Paraphrase cache in front of the generation tiers
+        self.semantic_cache = SemanticCache()
+
+        if load:
+            self.load_embeddings()
+            self.load_indexes()
+            try:
+                self.load_vector_stores()
+            except Exception as e:
+                print(f"Error loading vector stores: {e}")
+                print("Run vector_indexing.py first to create indexes.")
+            self.load_llm()
     
-    def _load_vector_stores(self):
-        """Load existing vector stores"""
-        try:
-            self.faq_vectorstore = Chroma(
-                collection_name=Config.FAQ_COLLECTION,
-                embedding_function=self.embeddings,
-                persist_directory=Config.VECTOR_STORE_DIR
-            )
-            
-            self.doc_vectorstore = Chroma(
-                collection_name=Config.DOC_COLLECTION,
-                embedding_function=self.embeddings,
-                persist_directory=Config.VECTOR_STORE_DIR
-            )
-            
-            print("Vector stores loaded successfully.")
-            
-        except Exception as e:
-            print(f"Error loading vector stores: {e}")
-            print("Run vector_indexing.py first to create indexes.")
-    
-    def _setup_retrievers(self):
-        """Setup retrievers with thresholds from paper"""
-        if self.faq_vectorstore:
-            self.faq_retriever = self.faq_vectorstore.as_retriever(
-                search_type="similarity_score_threshold",
-                search_kwargs={
-                    "score_threshold": Config.FAQ_THRESHOLD,
-                    "k": Config.FAQ_LIMIT
-                }
+    def load_llm(self):
+        """Create the LLM endpoint (unless one was passed in) and the chains that use it"""
+        if self.llm is None:
+            self.llm = HuggingFaceEndpoint(
+                repo_id=Config.LLM_MODEL,
+                huggingfacehub_api_token=Config.HUGGINGFACEHUB_API_TOKEN,
+                temperature=0.7,
+                top_p=0.95,
+                max_new_tokens=512
             )
+        self._setup_chains()
+    
+    def load_embeddings(self):
+        """Load the embedding model (unless embeddings were passed in)"""
+        if self.embeddings is None:
+            # Repeated questions skip the embedding model entirely; user questions
+            # stay in memory, only vectors written at index time are read from disk
+            self.embeddings = CachedEmbeddings(HuggingFaceEmbeddings(
+                model_name=Config.EMBEDDING_MODEL
+            ), persist=False)
+    
+    def warm_up(self):
+        """
+        Run one query through the model and both indexes, so the first real
+        request does not pay for lazy initialization. Bypasses the embedding
+        cache, which would otherwise answer it without touching the model.
+        """
+        model = self.embeddings.embeddings if isinstance(self.embeddings, CachedEmbeddings) else self.embeddings
+        question = "What are the admission requirements?"
+        query_embedding = model.embed_query(question)
+        self.retrieve_faqs(query_embedding)
+        self.retrieve_document_candidates(query_embedding, question)
+    
+    def load_indexes(self):
+        """
+        Load the read-only index snapshots the config asks for. Nothing here
+        opens Chroma, so a server can load them before forking its workers.
+        """
+        if Config.FAQ_BACKEND == "numpy" and self.faq_index is None:
+            faq_index = NumpyFAQIndex()
+            if faq_index.load():
+                self.faq_index = faq_index
+                print(f"In-memory FAQ index loaded ({len(faq_index)} entries).")
+            else:
+                print("No in-memory FAQ index found; using Chroma for FAQs. Run vector_indexing.py to create it.")
         
-        if self.doc_vectorstore:
-            self.doc_retriever = self.doc_vectorstore.as_retriever(
-                search_type="similarity_score_threshold",
-                search_kwargs={
-                    "score_threshold": Config.DOC_THRESHOLD,
-                    "k": Config.DOC_LIMIT
-                }
-            )
+        if self.doc_index is None:
+            if Config.DOC_QUANTIZATION != "none":
+                doc_index = QuantizedDocIndex(Config.DOC_QUANTIZATION)
+                if doc_index.load():
+                    self.doc_index = doc_index
+                    print(f"{Config.DOC_QUANTIZATION} document index loaded ({len(doc_index)} entries, {doc_index.memory_bytes()} bytes).")
+                else:
+                    print("No quantized document index found; using Chroma for documents. Run vector_indexing.py to create it.")
+            elif Config.DOC_BACKEND == "numpy":
+                doc_index = NumpyDocIndex()
+                if doc_index.load():
+                    self.doc_index = doc_index
+                    print(f"In-memory document index loaded ({len(doc_index)} entries).")
+                else:
+                    print("No in-memory document index found; using Chroma for documents. Run vector_indexing.py to create it.")
+        
+        # These otherwise load on first use
+        self.faq_answers._check_reload()
+        if Config.HYBRID_SEARCH:
+            self.bm25_index._check_reload()
+        if Config.SECTION_ROUTING:
+            self.section_router._check_reload()
+    
+    def load_vector_stores(self):
+        """Open the Chroma collections; raises if they cannot be opened"""
+        self.faq_vectorstore = Chroma(
+            collection_name=Config.FAQ_COLLECTION,
+            embedding_function=self.embeddings,
+            persist_directory=Config.VECTOR_STORE_DIR
+        )
+        
+        self.doc_vectorstore = Chroma(
+            collection_name=Config.DOC_COLLECTION,
+            embedding_function=self.embeddings,
+            persist_directory=Config.VECTOR_STORE_DIR
+        )
+        
+        print("Vector stores loaded successfully.")
+    
+    def _similarity_search_batch(
+        self,
+        vectorstore: Chroma,
+        query_embeddings: List[List[float]],
+        k: int,
+        score_threshold: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Search a vector store for many precomputed query embeddings in one Chroma query.
+        Returns, per query, (document, relevance score) pairs above the threshold, best first.
+        """
+        if not query_embeddings:
+            return []
+        
+        results = vectorstore._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        # Convert Chroma distances to the same [0, 1] relevance scale the thresholds use
+        relevance_fn = vectorstore._select_relevance_score_fn()
+        
+        batch_hits = []
+        for texts, metadatas, distances in zip(
+            results["documents"], results["metadatas"], results["distances"]
+        ):
+            hits = [
+                (Document(page_content=text, metadata=metadata or {}), relevance_fn(distance))
+                for text, metadata, distance in zip(texts, metadatas, distances)
+            ]
+            if score_threshold is not None:
+                hits = [(doc, score) for doc, score in hits if score >= score_threshold]
+            hits.sort(key=lambda hit: hit[1], reverse=True)
+            batch_hits.append(hits)
+        return batch_hits
     
+    def _similarity_search(
+        self,
+        vectorstore: Chroma,
+        query_embedding: List[float],
+        k: int,
+        score_threshold: Optional[float] = None
+    ) -> List[Tuple[Document, float]]:
+        """Search a vector store with a precomputed query embedding"""
+        return self._similarity_search_batch(vectorstore, [query_embedding], k, score_threshold)[0]
+
+    @staticmethod
+    def _format_docs(docs: List[Document]) -> str:
+        """Join retrieved documents into the RAG prompt context"""
+        return "\n\n".join(doc.page_content for doc in docs)
+
     def _setup_chains(self):
         """Setup LangChain chains for RAG and fallback"""
         # RAG chain for document-based responses
@@ -98,15 +234,12 @@ class URAGInference:
             Answer:"""
         )
 
-        if self.doc_retriever is not None:
-            self.rag_chain = (
-                {"context": self.doc_retriever, "question": RunnablePassthrough()}
-                | self.rag_prompt
-                | self.llm
-                | StrOutputParser()
-            )
-        else:
-            self.rag_chain = None
+        # Context is retrieved once in search_documents and passed in directly
+        self.rag_chain = (
+            self.rag_prompt
+            | self.llm
+            | StrOutputParser()
+        )
 
         # Fallback chain
         self.fallback_prompt = ChatPromptTemplate.from_template(
@@ -124,85 +257,592 @@ class URAGInference:
             | StrOutputParser()
         )
     
-    def search_faqs(self, query: str) -> Optional[Dict[str, Any]]:
-        """Tier 1: FAQ Search"""
-        if not self.faq_retriever:
-            return None
+    def _embed_query(self, query: str) -> List[float]:
+        with metrics.span("embedding"):
+            return self.embeddings.embed_query(query)
+    
+    def retrieve_faqs_batch(self, query_embeddings: List[List[float]]) -> List[List[Tuple[Document, float]]]:
+        """Tier 1 retrieval for many queries in one search"""
+        if not self.faq_vectorstore and self.faq_index is None:
+            return [[] for _ in query_embeddings]
         
         try:
-            faq_results = self.faq_retriever.invoke(query)
-            
-            if faq_results:
-                # Get the best matching FAQ
-                top_faq = faq_results[0]
-                confidence = getattr(top_faq, 'score', 0.95)  # Default high confidence for FAQ hits
-                
-                return {
-                    "type": "faq",
-                    "content": top_faq.metadata["answer"],
-                    "confidence": confidence,
-                    "faq_id": top_faq.metadata["faq_id"],
-                    "matched_question": top_faq.page_content
-                }
-        
+            if self.faq_index is not None:
+                return self.faq_index.search_batch(
+                    query_embeddings, k=Config.FAQ_LIMIT, score_threshold=Config.FAQ_THRESHOLD
+                )
+            return self._similarity_search_batch(
+                self.faq_vectorstore, query_embeddings,
+                k=Config.FAQ_LIMIT, score_threshold=Config.FAQ_THRESHOLD
+            )
         except Exception as e:
             print(f"Error in FAQ search: {e}")
+            return [[] for _ in query_embeddings]
+    
+    def retrieve_faqs(self, query_embedding: List[float]) -> List[Tuple[Document, float]]:
+        """Tier 1 retrieval: FAQ questions scoring at least FAQ_THRESHOLD"""
+        with metrics.span("faq_search"):
+            return self.retrieve_faqs_batch([query_embedding])[0]
+    
+    def retrieve_document_candidates_batch(
+        self,
+        query_embeddings: List[List[float]],
+        queries: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Tier 2 candidates for many queries in one search"""
+        if not self.doc_vectorstore and self.doc_index is None:
+            return [[] for _ in query_embeddings]
+        
+        hybrid = Config.HYBRID_SEARCH and queries is not None
+        rerank = Config.RERANK and queries is not None
+        # Re-ranking needs a wider first stage; _document_hits trims back to DOC_LIMIT
+        limit = Config.RERANK_CANDIDATES if rerank else Config.DOC_LIMIT
+        k = Config.HYBRID_CANDIDATES if hybrid else limit
+        try:
+            if Config.SECTION_ROUTING and queries is not None:
+                candidates = self._section_search_batch(queries, query_embeddings, k)
+            else:
+                candidates = self._search_document_index(query_embeddings, k)
+            
+            if hybrid:
+                candidates = [
+                    self._fuse_lexical(query, query_embedding, vector_hits, limit)
+                    for query, query_embedding, vector_hits in zip(queries, query_embeddings, candidates)
+                ]
+            if rerank:
+                candidates = [
+                    self.reranker.rerank(query, query_candidates)
+                    for query, query_candidates in zip(queries, candidates)
+                ]
+            return candidates
+        except Exception as e:
+            print(f"Error in document search: {e}")
+            return [[] for _ in query_embeddings]
+    
+    def _search_document_index(
+        self,
+        query_embeddings: List[List[float]],
+        k: int,
+        sections: Optional[List[str]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Vector search over the document chunks, optionally only those in `sections`"""
+        if self.doc_index is not None:
+            return self.doc_index.search_batch(query_embeddings, k=k, sections=sections)
+        where = {"section": {"$in": sections}} if sections is not None else None
+        return self._similarity_search_batch(self.doc_vectorstore, query_embeddings, k=k, where=where)
+    
+    def _section_search_batch(
+        self,
+        queries: List[str],
+        query_embeddings: List[List[float]],
+        k: int
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Search each query's predicted sections, one search per distinct prediction.
+        Queries with no prediction, or with nothing above DOC_THRESHOLD in their
+        sections, fall back to one search over the whole index.
+        """
+        groups: Dict[Optional[Tuple[str, ...]], List[int]] = {}
+        for i, (query, query_embedding) in enumerate(zip(queries, query_embeddings)):
+            sections = self.section_router.predict(query, query_embedding)
+            groups.setdefault(tuple(sections) if sections else None, []).append(i)
+        
+        candidates: List[List[Tuple[Document, float]]] = [[] for _ in queries]
+        unfiltered = groups.pop(None, [])
+        for sections, indices in groups.items():
+            try:
+                filtered = self._search_document_index([query_embeddings[i] for i in indices], k, list(sections))
+            except Exception as e:
+                print(f"Error in section-filtered document search: {e}")
+                filtered = [[] for _ in indices]
+            for i, hits in zip(indices, filtered):
+                if any(score >= Config.DOC_THRESHOLD for _, score in hits):
+                    candidates[i] = hits
+                else:
+                    self.section_router.record_fallback()
+                    unfiltered.append(i)
+        
+        if unfiltered:
+            unfiltered.sort()
+            for i, hits in zip(unfiltered, self._search_document_index([query_embeddings[i] for i in unfiltered], k)):
+                candidates[i] = hits
+        return candidates
+    
+    def retrieve_document_candidates(self, query_embedding: List[float], query: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Top DOC_LIMIT document chunks with their scores, before thresholding"""
+        queries = [query] if query is not None else None
+        with metrics.span("document_search"):
+            return self.retrieve_document_candidates_batch([query_embedding], queries)[0]
+    
+    def _fuse_lexical(
+        self,
+        query: str,
+        query_embedding: List[float],
+        vector_hits: List[Tuple[Document, float]],
+        limit: int
+    ) -> List[Tuple[Document, float]]:
+        """
+        Reciprocal rank fusion of the vector and BM25 rankings. Returns the top
+        `limit` chunks in fused order, each with its vector relevance score.
+        """
+        fused = {}
+        for ranking in (
+            [doc.metadata["doc_id"] for doc, _ in vector_hits],
+            [doc_id for doc_id, _ in self.bm25_index.search(query, Config.HYBRID_CANDIDATES)]
+        ):
+            for rank, doc_id in enumerate(ranking, start=1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (Config.RRF_K + rank)
+        chosen = sorted(fused, key=fused.get, reverse=True)[:limit]
+        
+        hits = {doc.metadata["doc_id"]: (doc, score) for doc, score in vector_hits}
+        lexical_only = [doc_id for doc_id in chosen if doc_id not in hits]
+        if lexical_only and self.doc_vectorstore:
+            # Chunks found only by BM25 still get a vector score for routing and confidence
+            stored = self.doc_vectorstore._collection.get(
+                ids=lexical_only, include=["documents", "metadatas", "embeddings"]
+            )
+            scores = relevance_scores(
+                np.asarray([query_embedding], dtype=np.float32),
+                np.asarray(stored["embeddings"], dtype=np.float32)
+            )[0]
+            for doc_id, text, metadata, score in zip(stored["ids"], stored["documents"], stored["metadatas"], scores):
+                hits[doc_id] = (Document(page_content=text, metadata=metadata or {}), float(score))
+        
+        return [hits[doc_id] for doc_id in chosen if doc_id in hits]
+    
+    @staticmethod
+    def _document_hits(candidates: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """The first DOC_LIMIT candidates that clear DOC_THRESHOLD"""
+        if Config.HYBRID_SEARCH:
+            # Routing stays on vector relevance; lexical matches only change which
+            # chunks make up the context once one of them clears the threshold
+            if any(score >= Config.DOC_THRESHOLD for _, score in candidates):
+                return candidates[:Config.DOC_LIMIT]
+            return []
+        hits = [(doc, score) for doc, score in candidates if score >= Config.DOC_THRESHOLD]
+        return hits[:Config.DOC_LIMIT]
+    
+    def retrieve_documents(self, query_embedding: List[float], query: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Tier 2 retrieval: document chunks scoring at least DOC_THRESHOLD"""
+        return self._document_hits(self.retrieve_document_candidates(query_embedding, query))
+    
+    def _faq_result(self, faq_hits: List[Tuple[Document, float]]) -> Dict[str, Any]:
+        """Build the tier 1 response from the best matching FAQ"""
+        with metrics.span("response_build"):
+            top_faq, confidence = faq_hits[0]
+            # Indexes built before the answer table existed keep the answer in metadata
+            answer = self.faq_answers.get(top_faq.metadata["faq_id"]) or top_faq.metadata.get("answer", "")
+        
+        return {
+            "type": "faq",
+            "content": answer,
+            "confidence": confidence,
+            "faq_id": top_faq.metadata["faq_id"],
+            "matched_question": top_faq.page_content
+        }
+    
+    def search_faqs(self, query: str, query_embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """Tier 1: FAQ Search"""
+        if query_embedding is None:
+            query_embedding = self._embed_query(query)
+        
+        faq_hits = self.retrieve_faqs(query_embedding)
+        if faq_hits:
+            return self._faq_result(faq_hits)
         
         return None
     
-    def search_documents(self, query: str) -> Optional[Dict[str, Any]]:
-        """Tier 2: Document Search with RAG"""
-        if not self.doc_retriever or not self.rag_chain:
-            return None
+    def _rag_inputs(self, query: str, doc_hits: List[Tuple[Document, float]]) -> Dict[str, str]:
+        """RAG prompt inputs built from documents that were already retrieved"""
+        with metrics.span("prompt_build"):
+            return {
+                "context": self._format_docs([doc for doc, _ in doc_hits]),
+                "question": query
+            }
+    
+    def _document_result(self, response: str, doc_hits: List[Tuple[Document, float]]) -> Dict[str, Any]:
+        """Build the tier 2 response from a RAG generation"""
+        with metrics.span("response_build"):
+            docs = [doc for doc, _ in doc_hits]
+            
+            # Extract sources
+            sources = [doc.metadata["url"] for doc in docs if doc.metadata.get("url")]
+            document_ids = [doc.metadata["doc_id"] for doc in docs]
+            
+            # Calculate confidence (average relevance of the chunks that cleared DOC_THRESHOLD);
+            # with hybrid search the context can also hold lower-scored and lexical-only chunks
+            scores = [score for _, score in doc_hits if score >= Config.DOC_THRESHOLD] or [score for _, score in doc_hits]
+            confidence = sum(scores) / len(scores)
         
+        return {
+            "type": "document",
+            "content": response,
+            "confidence": confidence,
+            "sources": sources,
+            "document_ids": document_ids
+        }
+    
+    def generate_document_answer(self, query: str, doc_hits: List[Tuple[Document, float]]) -> Optional[Dict[str, Any]]:
+        """Tier 2 generation: RAG over documents that were already retrieved"""
         try:
-            doc_results = self.doc_retriever.invoke(query)
-            
-            if doc_results:
-                # Generate RAG response
-                response = self.rag_chain.invoke(query)
-                
-                # Extract sources
-                sources = [doc.metadata["url"] for doc in doc_results if doc.metadata.get("url")]
-                document_ids = [doc.metadata["doc_id"] for doc in doc_results]
-                
-                # Calculate confidence (average of document scores)
-                confidence = sum(getattr(doc, 'score', 0.8) for doc in doc_results) / len(doc_results)
-                
-                return {
-                    "type": "document",
-                    "content": response,
-                    "confidence": confidence,
-                    "sources": sources,
-                    "document_ids": document_ids
-                }
+            inputs = self._rag_inputs(query, doc_hits)
+            with metrics.span("document_generation"):
+                response = self.rag_chain.invoke(inputs)
+            return self._document_result(response, doc_hits)
+        
+        except Exception as e:
+            print(f"Error in document search: {e}")
+        
+        return None
+    
+    async def agenerate_document_answer(self, query: str, doc_hits: List[Tuple[Document, float]]) -> Optional[Dict[str, Any]]:
+        """Async tier 2 generation via ainvoke"""
+        try:
+            inputs = self._rag_inputs(query, doc_hits)
+            with metrics.span("document_generation"):
+                response = await self.rag_chain.ainvoke(inputs)
+            return self._document_result(response, doc_hits)
         
         except Exception as e:
             print(f"Error in document search: {e}")
         
         return None
     
+    def search_documents(self, query: str, query_embedding: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """Tier 2: Document Search with RAG"""
+        if query_embedding is None:
+            query_embedding = self._embed_query(query)
+        
+        doc_hits = self.retrieve_documents(query_embedding, query)
+        if doc_hits:
+            return self.generate_document_answer(query, doc_hits)
+        
+        return None
+    
+    def _fallback_result(self, response: str) -> Dict[str, Any]:
+        """Build the tier 3 response with its disclaimer"""
+        return {
+            "type": "fallback",
+            "content": response + self.FALLBACK_DISCLAIMER,
+            "confidence": 0.3
+        }
+    
+    def _unavailable_result(self) -> Dict[str, Any]:
+        """Response used when the LLM cannot be reached"""
+        return {
+            "type": "fallback",
+            "content": "I apologize, but I'm unable to process your question right now. Please contact the admissions office directly for assistance.",
+            "confidence": self.UNAVAILABLE_CONFIDENCE
+        }
+    
     def generate_fallback(self, query: str) -> Dict[str, Any]:
         """Tier 3: Fallback Response"""
         try:
-            response = self.fallback_chain.invoke({"question": query})
-            
-            # Add disclaimer
-            disclaimer = "\n\n*Disclaimer: This is a general response. Please verify with official college sources for the most current and accurate information.*"
-            
-            return {
-                "type": "fallback",
-                "content": response + disclaimer,
-                "confidence": 0.3
-            }
+            with metrics.span("fallback_generation"):
+                response = self.fallback_chain.invoke({"question": query})
+            return self._fallback_result(response)
         
         except Exception as e:
             print(f"Error in fallback generation: {e}")
-            return {
-                "type": "fallback",
-                "content": "I apologize, but I'm unable to process your question right now. Please contact the admissions office directly for assistance.",
-                "confidence": 0.1
-            }
+            return self._unavailable_result()
+    
+    async def agenerate_fallback(self, query: str) -> Dict[str, Any]:
+        """Async tier 3 generation via ainvoke"""
+        try:
+            with metrics.span("fallback_generation"):
+                response = await self.fallback_chain.ainvoke({"question": query})
+            return self._fallback_result(response)
+        
+        except Exception as e:
+            print(f"Error in fallback generation: {e}")
+            return self._unavailable_result()
+    
+    @staticmethod
+    def _new_route(user_query: str, query_embedding: List[float]) -> Dict[str, Any]:
+        """Routing state for a query; tier defaults to fallback until a search hits"""
+        return {
+            "query": user_query,
+            "embedding": query_embedding,
+            "tier": "fallback",
+            "faq_hits": [],
+            "doc_hits": [],
+            "cached_result": None
+        }
+    
+    def route(self, user_query: str) -> Dict[str, Any]:
+        """
+        Decide the answering tier from retrieval scores without calling the LLM.
+        The query is embedded once and each index is searched at most once.
+        """
+        # Embed once and reuse the vector for every tier
+        query_embedding = self._embed_query(user_query)
+        route = self._new_route(user_query, query_embedding)
+        
+        # Tier 1: FAQ Search (hits already clear FAQ_THRESHOLD)
+        route["faq_hits"] = self.retrieve_faqs(query_embedding)
+        if route["faq_hits"]:
+            route["tier"] = "faq"
+            return route
+        
+        # Reuse a generated answer for a near-identical earlier question
+        route["cached_result"] = self.semantic_cache.lookup(query_embedding)
+        if route["cached_result"]:
+            route["tier"] = "cached"
+            return route
+        
+        # Tier 2: Document Search (hits already clear DOC_THRESHOLD)
+        route["doc_hits"] = self.retrieve_documents(query_embedding, user_query)
+        if route["doc_hits"]:
+            route["tier"] = "document"
+        
+        return route
+    
+    def _answer_without_generation(self, route: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Responses for routes that do not need the LLM (FAQ hit, semantic cache hit)"""
+        if route["tier"] == "faq":
+            faq_result = self._faq_result(route["faq_hits"])
+            print(f"FAQ hit with confidence {faq_result['confidence']:.3f}")
+            metrics.increment("urag_answers_total", tier="faq")
+            return faq_result
+        
+        if route["tier"] == "cached":
+            print(f"Semantic cache hit ({route['cached_result']['type']})")
+            metrics.increment("urag_answers_total", tier="semantic_cache")
+            return route["cached_result"]
+        
+        return None
+    
+    def _remember_generation(self, route: Dict[str, Any], result: Dict[str, Any]):
+        """Make a generated answer available to paraphrases of this query"""
+        if result["confidence"] > self.UNAVAILABLE_CONFIDENCE:
+            self.semantic_cache.add(route["embedding"], result)
+            metrics.increment("urag_answers_total", tier=result["type"])
+        else:
+            metrics.increment("urag_answers_total", tier="unavailable")
+    
+    def answer(self, route: Dict[str, Any]) -> Dict[str, Any]:
+        """Produce the response for a routing decision made by route()"""
+        result = self._answer_without_generation(route)
+        if result:
+            return result
+        
+        user_query = route["query"]
+        if route["tier"] == "document":
+            result = self.generate_document_answer(user_query, route["doc_hits"])
+            if result:
+                print(f"Document hit with confidence {result['confidence']:.3f}")
+        
+        # Tier 3: Fallback
+        if not result:
+            print("Using fallback response")
+            result = self.generate_fallback(user_query)
+        
+        self._remember_generation(route, result)
+        return result
+    
+    async def aroute(self, user_query: str) -> Dict[str, Any]:
+        """Async route(); embedding and vector search are CPU-bound and run in a worker thread"""
+        return await asyncio.to_thread(self.route, user_query)
+    
+    async def aanswer(self, route: Dict[str, Any]) -> Dict[str, Any]:
+        """Async answer(); LLM calls are awaited with ainvoke instead of holding a thread"""
+        result = self._answer_without_generation(route)
+        if result:
+            return result
+        
+        user_query = route["query"]
+        if route["tier"] == "document":
+            result = await self.agenerate_document_answer(user_query, route["doc_hits"])
+            if result:
+                print(f"Document hit with confidence {result['confidence']:.3f}")
+        
+        # Tier 3: Fallback
+        if not result:
+            print("Using fallback response")
+            result = await self.agenerate_fallback(user_query)
+        
+        self._remember_generation(route, result)
+        return result
+    
+    def route_batch(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        route() for many queries: one embed_documents call, one Chroma query for
+        the FAQ tier and one for the documents of the FAQ misses.
+        """
+        query_embeddings = self.embeddings.embed_documents(user_queries) if user_queries else []
+        routes = [self._new_route(q, e) for q, e in zip(user_queries, query_embeddings)]
+        
+        # Tier 1: FAQ Search
+        misses = []
+        for route, faq_hits in zip(routes, self.retrieve_faqs_batch(query_embeddings)):
+            route["faq_hits"] = faq_hits
+            if faq_hits:
+                route["tier"] = "faq"
+                continue
+            
+            route["cached_result"] = self.semantic_cache.lookup(route["embedding"])
+            if route["cached_result"]:
+                route["tier"] = "cached"
+                continue
+            
+            misses.append(route)
+        
+        # Tier 2: Document Search
+        candidates = self.retrieve_document_candidates_batch(
+            [route["embedding"] for route in misses], [route["query"] for route in misses]
+        )
+        for route, doc_candidates in zip(misses, candidates):
+            route["doc_hits"] = self._document_hits(doc_candidates)
+            if route["doc_hits"]:
+                route["tier"] = "document"
+        
+        return routes
+    
+    @staticmethod
+    def _batch_config() -> Dict[str, Any]:
+        """Runnable config bounding concurrent LLM calls in batch generation"""
+        return {"max_concurrency": Config.BATCH_MAX_CONCURRENCY}
+    
+    def _collect_batch_responses(
+        self,
+        routes: List[Dict[str, Any]],
+        results: List[Optional[Dict[str, Any]]],
+        indexes: List[int],
+        responses: List[Any],
+        tier: str
+    ):
+        """Turn batch generations into results; failed documents are left for the fallback"""
+        for i, response in zip(indexes, responses):
+            if isinstance(response, Exception):
+                print(f"Error in {tier} generation: {response}")
+                if tier == "fallback":
+                    results[i] = self._unavailable_result()
+                continue
+            
+            if tier == "document":
+                results[i] = self._document_result(response, routes[i]["doc_hits"])
+            else:
+                results[i] = self._fallback_result(response)
+            self._remember_generation(routes[i], results[i])
+    
+    def answer_batch(self, routes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """answer() for many routes; only the generation tiers reach the LLM, via batch()"""
+        results = [self._answer_without_generation(route) for route in routes]
+        
+        doc_indexes = [i for i, route in enumerate(routes) if route["tier"] == "document"]
+        if doc_indexes:
+            responses = self.rag_chain.batch(
+                [self._rag_inputs(routes[i]["query"], routes[i]["doc_hits"]) for i in doc_indexes],
+                config=self._batch_config(),
+                return_exceptions=True
+            )
+            self._collect_batch_responses(routes, results, doc_indexes, responses, "document")
+        
+        fallback_indexes = [i for i, result in enumerate(results) if result is None]
+        if fallback_indexes:
+            responses = self.fallback_chain.batch(
+                [{"question": routes[i]["query"]} for i in fallback_indexes],
+                config=self._batch_config(),
+                return_exceptions=True
+            )
+            self._collect_batch_responses(routes, results, fallback_indexes, responses, "fallback")
+        
+        return results
+    
+    async def aanswer_batch(self, routes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Async answer_batch() via abatch"""
+        results = [self._answer_without_generation(route) for route in routes]
+        
+        doc_indexes = [i for i, route in enumerate(routes) if route["tier"] == "document"]
+        if doc_indexes:
+            responses = await self.rag_chain.abatch(
+                [self._rag_inputs(routes[i]["query"], routes[i]["doc_hits"]) for i in doc_indexes],
+                config=self._batch_config(),
+                return_exceptions=True
+            )
+            self._collect_batch_responses(routes, results, doc_indexes, responses, "document")
+        
+        fallback_indexes = [i for i, result in enumerate(results) if result is None]
+        if fallback_indexes:
+            responses = await self.fallback_chain.abatch(
+                [{"question": routes[i]["query"]} for i in fallback_indexes],
+                config=self._batch_config(),
+                return_exceptions=True
+            )
+            self._collect_batch_responses(routes, results, fallback_indexes, responses, "fallback")
+        
+        return results
+    
+    def _batch_misses(self, user_queries: List[str], results: List[Optional[Dict[str, Any]]]) -> Dict[str, List[int]]:
+        """Answer-cache misses grouped by normalized question, so duplicates run once"""
+        misses: Dict[str, List[int]] = {}
+        for i, (user_query, result) in enumerate(zip(user_queries, results)):
+            if result is None:
+                misses.setdefault(normalize_query(user_query), []).append(i)
+        return misses
+    
+    def _fill_batch_results(
+        self,
+        user_queries: List[str],
+        results: List[Optional[Dict[str, Any]]],
+        misses: Dict[str, List[int]],
+        answers: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        for indexes, result in zip(misses.values(), answers):
+            self.remember_answer(user_queries[indexes[0]], result)
+            for i in indexes:
+                results[i] = dict(result)
+        return results
+    
+    def query_batch(self, user_queries: List[str]) -> List[Dict[str, Any]]:
+        """URAG inference for many questions at once, in input order"""
+        print(f"Processing batch of {len(user_queries)} queries")
+        
+        results = [self.answer_cache.get(user_query) for user_query in user_queries]
+        misses = self._batch_misses(user_queries, results)
+        
+        routes = self.route_batch([user_queries[indexes[0]] for indexes in misses.values()])
+        return self._fill_batch_results(user_queries, results, misses, self.answer_batch(routes))
+    
+    async def aquery_batch(
+        self,
+        user_queries: List[str],
+        run_blocking: Optional[Callable[..., Awaitable]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async query_batch(); routing runs in a worker thread, generation via abatch.
+        run_blocking places the routing on the caller's pool (default: asyncio.to_thread).
+        """
+        if run_blocking is None:
+            run_blocking = asyncio.to_thread
+        
+        print(f"Processing batch of {len(user_queries)} queries")
+        
+        results = [self.answer_cache.get(user_query) for user_query in user_queries]
+        misses = self._batch_misses(user_queries, results)
+        
+        routes = await run_blocking(
+            self.route_batch, [user_queries[indexes[0]] for indexes in misses.values()]
+        )
+        return self._fill_batch_results(user_queries, results, misses, await self.aanswer_batch(routes))
+    
+    @staticmethod
+    def needs_generation(route: Dict[str, Any]) -> bool:
+        """Whether answering this route calls the LLM"""
+        return route["tier"] in ("document", "fallback")
+    
+    def cached_answer(self, user_query: str) -> Optional[Dict[str, Any]]:
+        """Exact-match answer cache lookup"""
+        cached = self.answer_cache.get(user_query)
+        if cached:
+            print(f"Answer cache hit ({cached['type']})")
+            metrics.increment("urag_answers_total", tier="answer_cache")
+        return cached
+    
+    def remember_answer(self, user_query: str, result: Dict[str, Any]):
+        """Store a response in the answer cache (never an outage message)"""
+        if result["confidence"] > self.UNAVAILABLE_CONFIDENCE:
+            self.answer_cache.put(user_query, result)
     
     def query(self, user_query: str) -> Dict[str, Any]:
         """
@@ -211,28 +851,180 @@ class URAGInference:
         """
         print(f"Processing query: {user_query}")
         
-        # Tier 1: FAQ Search
-        faq_result = self.search_faqs(user_query)
-        if faq_result and faq_result["confidence"] >= Config.FAQ_THRESHOLD:
-            print(f"FAQ hit with confidence {faq_result['confidence']:.3f}")
-            return faq_result
+        cached = self.cached_answer(user_query)
+        if cached:
+            return cached
         
-        # Tier 2: Document Search
-        doc_result = self.search_documents(user_query)
-        if doc_result and doc_result["confidence"] >= Config.DOC_THRESHOLD:
-            print(f"Document hit with confidence {doc_result['confidence']:.3f}")
-            return doc_result
+        result = self.answer(self.route(user_query))
+        self.remember_answer(user_query, result)
+        return result
+    
+    async def aquery(self, user_query: str) -> Dict[str, Any]:
+        """Async twin of query() for event-loop callers"""
+        if Config.SPECULATIVE_TIERS:
+            # Checks the answer cache itself
+            return await self.aquery_speculative(user_query)
         
-        # Tier 3: Fallback
-        print("Using fallback response")
-        return self.generate_fallback(user_query)
+        print(f"Processing query: {user_query}")
+        
+        cached = self.cached_answer(user_query)
+        if cached:
+            return cached
+        
+        result = await self.aanswer(await self.aroute(user_query))
+        self.remember_answer(user_query, result)
+        return result
+    
+    async def astream_answer(self, route: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream the response for a routing decision as events.
+        FAQ and cached answers are a single "answer" event. Generated answers send
+        "meta" (tier, confidence, sources) first, then "token" events as the LLM
+        produces them, then "done"; "error" replaces the rest if generation fails.
+        """
+        user_query = route["query"]
+        
+        result = self._answer_without_generation(route)
+        if result:
+            self.remember_answer(user_query, result)
+            yield {"event": "answer", "data": result}
+            return
+        
+        if route["tier"] == "document":
+            print("Streaming document response")
+            result = self._document_result("", route["doc_hits"])
+            stream = self.rag_chain.astream(self._rag_inputs(user_query, route["doc_hits"]))
+            suffix = ""
+        else:
+            print("Streaming fallback response")
+            result = self._fallback_result("")
+            stream = self.fallback_chain.astream({"question": user_query})
+            suffix = self.FALLBACK_DISCLAIMER
+        
+        meta = {key: value for key, value in result.items() if key != "content"}
+        yield {"event": "meta", "data": meta}
+        
+        chunks = []
+        try:
+            with metrics.span(f"{route['tier']}_generation"):
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    yield {"event": "token", "data": {"text": chunk}}
+        except Exception as e:
+            print(f"Error streaming {route['tier']} response: {e}")
+            metrics.increment("urag_answers_total", tier="unavailable")
+            yield {"event": "error", "data": self._unavailable_result()}
+            return
+        
+        if suffix:
+            chunks.append(suffix)
+            yield {"event": "token", "data": {"text": suffix}}
+        yield {"event": "done", "data": {}}
+        
+        result["content"] = "".join(chunks)
+        self._remember_generation(route, result)
+        self.remember_answer(user_query, result)
+    
+    @staticmethod
+    def _clearly_below_threshold(candidates: List[Tuple[Document, float]]) -> bool:
+        """Document scores are far enough under DOC_THRESHOLD to bet on the fallback tier"""
+        best = max((score for _, score in candidates), default=0.0)
+        return best < Config.DOC_THRESHOLD - Config.SPECULATIVE_FALLBACK_MARGIN
+    
+    async def aquery_speculative(
+        self,
+        user_query: str,
+        run_blocking: Optional[Callable[..., Awaitable]] = None,
+        run_generation: Optional[Callable[..., Awaitable]] = None
+    ) -> Dict[str, Any]:
+        """
+        Speculative variant of aquery(). Document retrieval runs alongside the FAQ
+        search, and fallback generation starts as soon as document scores are
+        clearly below DOC_THRESHOLD. Work an earlier tier makes unnecessary is cancelled.
+        
+        run_blocking / run_generation let the caller place CPU work and LLM calls
+        on its own pools (defaults: asyncio.to_thread and a direct await).
+        """
+        if run_blocking is None:
+            run_blocking = asyncio.to_thread
+        if run_generation is None:
+            async def run_generation(fn, *args):
+                return await fn(*args)
+        
+        print(f"Processing query (speculative): {user_query}")
+        
+        cached = self.cached_answer(user_query)
+        if cached:
+            return cached
+        
+        query_embedding = await run_blocking(self._embed_query, user_query)
+        route = self._new_route(user_query, query_embedding)
+        
+        faq_task = asyncio.ensure_future(run_blocking(self.retrieve_faqs, query_embedding))
+        doc_task = asyncio.ensure_future(run_blocking(self.retrieve_document_candidates, query_embedding, user_query))
+        fallback_task = None
+        
+        try:
+            # Documents back first with no chance of a hit: start the fallback while FAQs are searched
+            done, _ = await asyncio.wait({faq_task, doc_task}, return_when=asyncio.FIRST_COMPLETED)
+            if faq_task not in done and self._clearly_below_threshold(doc_task.result()):
+                print("Starting speculative fallback generation")
+                fallback_task = asyncio.ensure_future(run_generation(self.agenerate_fallback, user_query))
+            
+            # Tier 1: FAQ Search
+            route["faq_hits"] = await faq_task
+            if route["faq_hits"]:
+                route["tier"] = "faq"
+            else:
+                route["cached_result"] = self.semantic_cache.lookup(query_embedding)
+                if route["cached_result"]:
+                    route["tier"] = "cached"
+            
+            result = self._answer_without_generation(route)
+            if result:
+                self.remember_answer(user_query, result)
+                return result
+            
+            # Tier 2: Document Search
+            route["doc_hits"] = self._document_hits(await doc_task)
+            if route["doc_hits"]:
+                route["tier"] = "document"
+                result = await run_generation(self.agenerate_document_answer, user_query, route["doc_hits"])
+                if result:
+                    print(f"Document hit with confidence {result['confidence']:.3f}")
+            
+            # Tier 3: Fallback
+            if not result:
+                print("Using fallback response")
+                if fallback_task is None:
+                    fallback_task = asyncio.ensure_future(run_generation(self.agenerate_fallback, user_query))
+                result = await fallback_task
+            
+            self._remember_generation(route, result)
+            self.remember_answer(user_query, result)
+            return result
+        
+        finally:
+            # Retrieval threads run to completion, but their results are discarded
+            for task in (faq_task, doc_task, fallback_task):
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                # An abandoned task may still fail (e.g. PoolSaturatedError); nobody awaits it
+                task.add_done_callback(_discard_outcome)
     
     def get_stats(self) -> Dict[str, Any]:
         """Get system statistics"""
         stats = {
             "faq_count": 0,
             "document_count": 0,
-            "total_variations": 0
+            "total_variations": 0,
+            "answer_cache": self.answer_cache.stats(),
+            "semantic_cache": self.semantic_cache.stats(),
+            "embedding_cache": self.embeddings.stats() if isinstance(self.embeddings, CachedEmbeddings) else {},
+            "reranker": self.reranker.stats(),
+            "section_routing": self.section_router.stats()
         }
         
         try:
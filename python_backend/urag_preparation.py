@@ -3,10 +3,16 @@ Step 2: URAG Preparation Phase
 Implements URAG-D (Document Augmentation) and URAG-F (FAQ Enrichment)
 """
 
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Optional, Set
 from langchain_huggingface import HuggingFaceEndpoint, HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseLanguageModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_community.document_loaders import JSONLoader
 from langchain_community.document_loaders import PyPDFLoader  # <-- Add this import
@@ -14,32 +20,53 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 from config import Config
+from llm_cache import LLMResponseCache, CachedChain
 
 class URAGPreparation:
-    def __init__(self):
-        # Initialize LLM and embeddings
+    def __init__(self, llm: Optional[BaseLanguageModel] = None, embeddings: Optional[Embeddings] = None):
+        # Initialize LLM and embeddings (defaults to the models named in Config)
         os.environ["HUGGINGFACEHUB_API_TOKEN"] = Config.HUGGINGFACEHUB_API_TOKEN
 
         # Replace HuggingFaceHub with HuggingFaceEndpoint
-        self.llm = HuggingFaceEndpoint(
+        self.llm_params = {
+            "temperature": 0.7,
+            "top_p": 0.95,
+            "max_new_tokens": 512
+        }
+        self.llm = llm if llm is not None else HuggingFaceEndpoint(
             repo_id=Config.LLM_MODEL,
             huggingfacehub_api_token=Config.HUGGINGFACEHUB_API_TOKEN,
-            temperature=0.7,
-            top_p=0.95,
-            max_new_tokens=512
+            **self.llm_params
         )
+        
+        # LLM response cache key: an injected LLM (e.g. a benchmark fake) must
+        # never serve or overwrite the configured model's responses
+        if llm is None:
+            self.llm_model, self.llm_cache_params = Config.LLM_MODEL, self.llm_params
+        else:
+            self.llm_model = f"{llm._llm_type}:{getattr(llm, 'repo_id', None) or type(llm).__name__}"
+            self.llm_cache_params = llm._identifying_params
+
+        # Reruns only pay for prompts whose inputs changed
+        self.llm_cache = LLMResponseCache()
 
         # Replace HuggingFaceEmbeddings import
-        self.embeddings = HuggingFaceEmbeddings(
+        self.embeddings = embeddings if embeddings is not None else HuggingFaceEmbeddings(
             model_name=Config.EMBEDDING_MODEL
         )
 
+        # Page changes detected by the last urag_d_augment_documents run
+        self.last_changes = {}
+
         # Text splitter for semantic chunking
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
+
+        self._setup_augmentation_chains()
+        self._setup_enrichment_chains()
     
     def _load_pdf_documents(self, pdf_folder: str) -> List[Dict[str, Any]]:
         """
@@ -123,91 +150,331 @@ class URAGPreparation:
             print("No documents found. Please provide firecrawl JSON and/or PDFs.")
             return []
 
-        augmented_docs = []
+        # Only new or changed pages go through the LLM again: pages whose content
+        # hash matches the last run (or an interrupted run's checkpoint) are reused
+        previous = self._load_previous_augmentation()
+        checkpoint = self._load_checkpoint()
         
+        completed = {}  # page key -> augmented page
+        content_hashes = {}  # page key -> hash of current content
+        pending = []
+        order = []
+        changes = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
         for i, page_data in enumerate(crawled_data):
-            print(f"Processing document {i+1}/{len(crawled_data)}: {page_data.get('url', 'Unknown URL')}")
-            
-            content = page_data.get('markdown', '') or page_data.get('content', '')
+            content = self._page_content(page_data)
             if not content or len(content.strip()) < 100:
                 continue
+            source = self._page_key(page_data)
+            if source in content_hashes:
+                continue  # duplicate crawl entry
             
-            try:
-                # Step 1: Extract general context (Algorithm 1, Line 4)
-                context_prompt = ChatPromptTemplate.from_template(
-                    """Extract the overarching general context and main themes from this college website document. 
-                    Focus on institutional information, academic programs, and student services.
-                    
-                    Document: {doc_content}
-                    
-                    General Context:"""
-                )
-                context_chain = context_prompt | self.llm | StrOutputParser()
-                general_context = context_chain.invoke({"doc_content": content[:2000]})  # Limit for API
-                
-                # Step 2: Semantic chunking
-                doc = Document(page_content=content, metadata=page_data)
-                chunks = self.text_splitter.split_documents([doc])
-                
-                for chunk in chunks:
-                    if len(chunk.page_content.strip()) < 50:
-                        continue
-                    
-                    # Step 3: Rewrite chunk with context (Algorithm 1, Line 7)
-                    rewrite_prompt = ChatPromptTemplate.from_template(
-                        """Rewrite this text chunk to be more coherent and informative using the provided context.
-                        Make it self-contained while preserving all important information.
-                        
-                        General Context: {context}
-                        
-                        Original Chunk: {chunk_content}
-                        
-                        Rewritten Chunk:"""
-                    )
-                    rewrite_chain = rewrite_prompt | self.llm | StrOutputParser()
-                    rewritten = rewrite_chain.invoke({
-                        "context": general_context,
-                        "chunk_content": chunk.page_content
-                    })
-                    
-                    # Step 4: Generate summary (Algorithm 1, Line 8)
-                    summary_prompt = ChatPromptTemplate.from_template(
-                        """Create a brief, informative summary sentence for this rewritten content.
-                        Focus on the key information relevant to college admissions and student queries.
-                        
-                        Content: {rewritten}
-                        
-                        Summary:"""
-                    )
-                    summary_chain = summary_prompt | self.llm | StrOutputParser()
-                    summary = summary_chain.invoke({"rewritten": rewritten})
-                    
-                    # Step 5: Combine summary + rewritten (Algorithm 1, Line 9)
-                    augmented_content = f"{summary.strip()}\n\n{rewritten.strip()}"
-                    
-                    augmented_docs.append({
-                        "id": f"doc_{i}_{len(augmented_docs)}",
-                        "content": chunk.page_content,
-                        "augmented_content": augmented_content,
-                        "summary": summary.strip(),
-                        "metadata": {
-                            "url": page_data.get('url', ''),
-                            "title": page_data.get('title', ''),
-                            "section": self._extract_section(page_data.get('url', ''))
-                        }
-                    })
-                
-            except Exception as e:
-                print(f"Error processing document {i}: {e}")
-                continue
+            content_hash = self._content_hash(content)
+            content_hashes[source] = content_hash
+            order.append(source)
+            
+            if source not in previous:
+                changes["added"] += 1
+            elif previous[source]["content_hash"] != content_hash:
+                changes["changed"] += 1
+            else:
+                changes["unchanged"] += 1
+            
+            for known in (previous.get(source), checkpoint.get(source)):
+                if known and known["content_hash"] == content_hash:
+                    completed[source] = known
+                    break
+            else:
+                pending.append(i)
+        
+        changes["removed"] = len(set(previous) - set(content_hashes))
+        self.last_changes = changes
+        print(
+            f"Pages: {changes['added']} new, {changes['changed']} changed, "
+            f"{changes['unchanged']} unchanged, {changes['removed']} removed. "
+            f"{len(pending)} to augment."
+        )
+        
+        failed = self._augment_pages(crawled_data, pending, content_hashes, completed)
+        for i in failed:
+            # Keep serving the last good version of a changed page that failed
+            source = self._page_key(crawled_data[i])
+            if source in previous:
+                completed[source] = previous[source]
+        
+        # Assemble in crawl order; chunks of removed pages are dropped
+        augmented_docs = []
+        for source in order:
+            if source in completed:
+                augmented_docs.extend(completed[source]["chunks"])
         
         # Save augmented documents
         with open(Config.AUGMENTED_DOCS_FILE, 'w', encoding='utf-8') as f:
             json.dump(augmented_docs, f, indent=4, ensure_ascii=False)
         
+        if failed:
+            print(f"{len(failed)} documents failed and will be retried on the next run.")
+        else:
+            # Everything is in augmented_docs.json now
+            if os.path.exists(Config.AUGMENT_CHECKPOINT_FILE):
+                os.remove(Config.AUGMENT_CHECKPOINT_FILE)
+        
+        self.llm_cache.report()
         print(f"URAG-D completed. Generated {len(augmented_docs)} augmented document chunks.")
         return augmented_docs
     
+    def _augment_pages(
+        self,
+        crawled_data: List[Dict[str, Any]],
+        pending: List[int],
+        content_hashes: Dict[str, str],
+        completed: Dict[str, Dict[str, Any]]
+    ) -> Set[int]:
+        """
+        Augment pages with at most AUGMENT_CONCURRENCY LLM requests in flight.
+        Context extraction and chunk rewrite+summary jobs share one worker pool;
+        each page is checkpointed as soon as its last chunk finishes.
+        Returns the indexes of pages that failed.
+        """
+        pages = {}  # page index -> chunks being augmented
+        failed = set()
+        
+        with ThreadPoolExecutor(max_workers=Config.AUGMENT_CONCURRENCY) as executor:
+            futures = {}
+            for i in pending:
+                page_data = crawled_data[i]
+                print(f"Queueing document {i+1}/{len(crawled_data)}: {self._page_url(page_data) or 'Unknown URL'}")
+                futures[executor.submit(self._extract_context, self._page_content(page_data))] = (i, None)
+            
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, chunk_index = futures.pop(future)
+                    if i in failed:
+                        continue
+                    
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Error processing document {i}: {e}")
+                        failed.add(i)
+                        pages.pop(i, None)
+                        continue
+                    
+                    if chunk_index is None:
+                        # Context ready: fan out the chunks of this page
+                        chunks = self._split_page(crawled_data[i])
+                        pages[i] = {"chunks": [None] * len(chunks), "remaining": len(chunks)}
+                        for j, chunk in enumerate(chunks):
+                            futures[executor.submit(self._augment_chunk, result, chunk)] = (i, j)
+                    else:
+                        pages[i]["chunks"][chunk_index] = result
+                        pages[i]["remaining"] -= 1
+                    
+                    if pages[i]["remaining"] == 0:
+                        source = self._page_key(crawled_data[i])
+                        page = self._finish_page(crawled_data[i], content_hashes[source], pages.pop(i)["chunks"])
+                        completed[source] = page
+                        self._append_checkpoint(page)
+                        print(f"Augmented document {i+1}/{len(crawled_data)} ({len(page['chunks'])} chunks)")
+        
+        return failed
+    
+    def _cached_chain(self, template: str) -> CachedChain:
+        """prompt | llm | parser whose responses go through the LLM response cache"""
+        chain = ChatPromptTemplate.from_template(template) | self.llm | StrOutputParser()
+        return CachedChain(template, chain, self.llm_cache, self.llm_model, self.llm_cache_params)
+    
+    def _setup_augmentation_chains(self):
+        """Setup LangChain chains for URAG-D (Algorithm 1)"""
+        # Step 1: Extract general context (Algorithm 1, Line 4)
+        self.context_chain = self._cached_chain(
+            """Extract the overarching general context and main themes from this college website document. 
+            Focus on institutional information, academic programs, and student services.
+            
+            Document: {doc_content}
+            
+            General Context:"""
+        )
+        
+        # Step 3: Rewrite chunk with context (Algorithm 1, Line 7)
+        self.rewrite_chain = self._cached_chain(
+            """Rewrite this text chunk to be more coherent and informative using the provided context.
+            Make it self-contained while preserving all important information.
+            
+            General Context: {context}
+            
+            Original Chunk: {chunk_content}
+            
+            Rewritten Chunk:"""
+        )
+        
+        # Step 4: Generate summary (Algorithm 1, Line 8)
+        self.summary_chain = self._cached_chain(
+            """Create a brief, informative summary sentence for this rewritten content.
+            Focus on the key information relevant to college admissions and student queries.
+            
+            Content: {rewritten}
+            
+            Summary:"""
+        )
+    
+    def _setup_enrichment_chains(self):
+        """Setup LangChain chains for URAG-F (Algorithm 2)"""
+        # Generate new Q&A pairs from documents (Algorithm 2, Lines 4-6)
+        self.qa_chain = self._cached_chain(
+            """Based on this college document content, generate 3-5 relevant question-answer pairs 
+            that prospective students might ask about admissions, courses, fees, or campus life.
+            
+            Return as JSON array: [{{"question": "...", "answer": "..."}}]
+            
+            Document Content: {doc_content}
+            
+            Generated Q&A Pairs:"""
+        )
+        
+        # Paraphrase questions for diversity (Algorithm 2, Lines 7-9)
+        self.paraphrase_chain = self._cached_chain(
+            """Generate 3 paraphrased variations of this question while keeping the same meaning.
+            Make them sound natural and diverse in phrasing.
+            
+            Original Question: {question}
+            
+            Return as JSON array: ["variation1", "variation2", "variation3"]
+            
+            Paraphrased Questions:"""
+        )
+    
+    def _invoke_with_retry(self, chain, inputs: Dict[str, Any]) -> str:
+        """Invoke an LLM chain, retrying with exponential backoff and jitter"""
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            try:
+                return chain.invoke(inputs)
+            except Exception as e:
+                if attempt == Config.LLM_MAX_RETRIES:
+                    raise
+                delay = Config.LLM_RETRY_BACKOFF * (2 ** attempt) * (1 + random.random())
+                print(f"LLM call failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _extract_context(self, content: str) -> str:
+        """Step 1: general context of a page"""
+        return self._invoke_with_retry(self.context_chain, {"doc_content": content[:2000]})  # Limit for API
+    
+    def _split_page(self, page_data: Dict[str, Any]) -> List[Document]:
+        """Step 2: Semantic chunking (short chunks are dropped)"""
+        doc = Document(page_content=self._page_content(page_data), metadata=page_data)
+        chunks = self.text_splitter.split_documents([doc])
+        return [chunk for chunk in chunks if len(chunk.page_content.strip()) >= 50]
+    
+    def _augment_chunk(self, general_context: str, chunk: Document) -> Dict[str, str]:
+        """Steps 3-5 for one chunk: rewrite, summarize, combine"""
+        rewritten = self._invoke_with_retry(self.rewrite_chain, {
+            "context": general_context,
+            "chunk_content": chunk.page_content
+        })
+        summary = self._invoke_with_retry(self.summary_chain, {"rewritten": rewritten})
+        
+        # Step 5: Combine summary + rewritten (Algorithm 1, Line 9)
+        return {
+            "content": chunk.page_content,
+            "augmented_content": f"{summary.strip()}\n\n{rewritten.strip()}",
+            "summary": summary.strip()
+        }
+    
+    def _finish_page(self, page_data: Dict[str, Any], content_hash: str, chunks: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Attach stable ids and metadata to the augmented chunks of one page"""
+        source = self._page_key(page_data)
+        # Ids derive from the page key, so they survive pages being added or reordered
+        page_id = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+        return {
+            "source": source,
+            "content_hash": content_hash,
+            "chunks": [
+                {
+                    "id": f"doc_{page_id}_{j}",
+                    **chunk,
+                    "metadata": {
+                        "url": self._page_url(page_data),
+                        "title": page_data.get('title') or (page_data.get('metadata') or {}).get('title', ''),
+                        "section": self._extract_section(self._page_url(page_data)),
+                        "source": source,
+                        "content_hash": content_hash
+                    }
+                }
+                for j, chunk in enumerate(chunks)
+            ]
+        }
+    
+    @staticmethod
+    def _page_content(page_data: Dict[str, Any]) -> str:
+        return page_data.get('markdown', '') or page_data.get('content', '')
+    
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def _page_url(page_data: Dict[str, Any]) -> str:
+        """Page URL; firecrawl output keeps it in metadata.sourceURL rather than at the top level"""
+        metadata = page_data.get('metadata') or {}
+        return page_data.get('url') or metadata.get('sourceURL') or metadata.get('url') or ''
+    
+    @classmethod
+    def _page_key(cls, page_data: Dict[str, Any]) -> str:
+        """
+        Identify a crawled page (PDF pages share a URL, so include the page number).
+        Pages without a URL are keyed by their content, so they are never
+        mistaken for duplicates of each other.
+        """
+        key = cls._page_url(page_data)
+        if not key:
+            return f"content:{cls._content_hash(cls._page_content(page_data))}"
+        page = (page_data.get('metadata') or {}).get('page')
+        return f"{key}#page={page}" if page else key
+    
+    def _load_previous_augmentation(self) -> Dict[str, Dict[str, Any]]:
+        """Augmented chunks from the last run, grouped by the page they came from"""
+        try:
+            with open(Config.AUGMENTED_DOCS_FILE, 'r', encoding='utf-8') as f:
+                augmented_docs = json.load(f)
+        except FileNotFoundError:
+            return {}
+        
+        previous = {}
+        for doc in augmented_docs:
+            metadata = doc.get("metadata", {})
+            if "source" not in metadata:
+                continue  # written before content hashes existed; re-augment
+            page = previous.setdefault(metadata["source"], {
+                "source": metadata["source"],
+                "content_hash": metadata["content_hash"],
+                "chunks": []
+            })
+            page["chunks"].append(doc)
+        return previous
+    
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        """Pages completed by an earlier, interrupted run, keyed by page key"""
+        completed = {}
+        if not os.path.exists(Config.AUGMENT_CHECKPOINT_FILE):
+            return completed
+        
+        with open(Config.AUGMENT_CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    page = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                completed[page["source"]] = page
+        return completed
+    
+    def _append_checkpoint(self, page: Dict[str, Any]):
+        """Persist one finished page so a crash does not lose it"""
+        with open(Config.AUGMENT_CHECKPOINT_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(page, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
     def urag_f_enrich_faqs(self) -> List[Dict[str, Any]]:
         """
         URAG-F: FAQ Enrichment
@@ -236,21 +503,9 @@ class URAGPreparation:
         enriched_faqs = initial_faqs.copy()
         
         # Generate new Q&A pairs from documents (Algorithm 2, Lines 4-6)
-        qa_gen_prompt = ChatPromptTemplate.from_template(
-            """Based on this college document content, generate 3-5 relevant question-answer pairs 
-            that prospective students might ask about admissions, courses, fees, or campus life.
-            
-            Return as JSON array: [{"question": "...", "answer": "..."}]
-            
-            Document Content: {doc_content}
-            
-            Generated Q&A Pairs:"""
-        )
-        qa_chain = qa_gen_prompt | self.llm | StrOutputParser()
-        
         for doc in augmented_docs[:10]:  # Limit to avoid API costs
             try:
-                new_qas_text = qa_chain.invoke({"doc_content": doc["augmented_content"]})
+                new_qas_text = self.qa_chain.invoke({"doc_content": doc["augmented_content"]})
                 # Parse JSON response
                 new_qas = json.loads(new_qas_text)
                 if isinstance(new_qas, list):
@@ -260,18 +515,6 @@ class URAGPreparation:
                 continue
         
         # Paraphrase questions for diversity (Algorithm 2, Lines 7-9)
-        paraphrase_prompt = ChatPromptTemplate.from_template(
-            """Generate 3 paraphrased variations of this question while keeping the same meaning.
-            Make them sound natural and diverse in phrasing.
-            
-            Original Question: {question}
-            
-            Return as JSON array: ["variation1", "variation2", "variation3"]
-            
-            Paraphrased Questions:"""
-        )
-        paraphrase_chain = paraphrase_prompt | self.llm | StrOutputParser()
-        
         final_faqs = []
         for faq in enriched_faqs:
             try:
@@ -284,7 +527,7 @@ class URAGPreparation:
                 }
                 
                 # Generate variations
-                variations_text = paraphrase_chain.invoke({"question": faq["question"]})
+                variations_text = self.paraphrase_chain.invoke({"question": faq["question"]})
                 variations = json.loads(variations_text)
                 if isinstance(variations, list):
                     faq_item["variations"] = variations
@@ -305,6 +548,7 @@ class URAGPreparation:
         with open(Config.ENRICHED_FAQS_FILE, 'w', encoding='utf-8') as f:
             json.dump(final_faqs, f, indent=4, ensure_ascii=False)
         
+        self.llm_cache.report()
         print(f"URAG-F completed. Generated {len(final_faqs)} enriched FAQs.")
         return final_faqs
     
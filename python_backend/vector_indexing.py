@@ -5,23 +5,30 @@ Creates and manages Chroma vector stores for FAQs and documents
 
 import json
 import os
-from typing import List
+from typing import Any, Dict, List, Optional
 from langchain_community.vectorstores import Chroma
-from langchain_core.documents import Document
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from config import Config
+from bm25_index import BM25Index
+from embedding_cache import CachedEmbeddings
+from embedding_engine import EmbeddingEngine
+from faq_index import FAQAnswerStore, NumpyFAQIndex
+from quantized_index import QuantizedDocIndex
+from section_router import SectionRouter
 
 class VectorIndexer:
-    def __init__(self):
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=Config.EMBEDDING_MODEL
-        )
+    # Chroma rejects writes larger than its max batch size
+    UPSERT_BATCH_SIZE = 1000
+    
+    def __init__(self, embeddings: Optional[Embeddings] = None):
+        # Unchanged texts come from the embedding cache instead of the model
+        self.embeddings = embeddings if embeddings is not None else CachedEmbeddings(EmbeddingEngine())
         
         # Ensure vector store directory exists
         os.makedirs(Config.VECTOR_STORE_DIR, exist_ok=True)
     
     def create_faq_index(self) -> Chroma:
-        """Create vector index for FAQs (embed questions only)"""
+        """Create or update the vector index for FAQs (embed questions only)"""
         print("Creating FAQ vector index...")
         
         # Load enriched FAQs
@@ -32,43 +39,40 @@ class VectorIndexer:
             print("No enriched FAQs found. Run urag_preparation.py first.")
             return None
         
-        # Create documents for FAQ questions and variations
-        faq_docs = []
+        # Create entries for FAQ questions and variations; answers are stored
+        # once in the answer table instead of in every entry's metadata
+        ids, texts, metadatas = [], [], []
         for faq in faqs:
             # Main question
-            faq_docs.append(Document(
-                page_content=faq["question"],
-                metadata={
-                    "faq_id": faq["id"],
-                    "answer": faq["answer"],
-                    "type": "main_question"
-                }
-            ))
+            ids.append(f"{faq['id']}_q")
+            texts.append(faq["question"])
+            metadatas.append({
+                "faq_id": faq["id"],
+                "type": "main_question"
+            })
             
             # Question variations
-            for variation in faq.get("variations", []):
-                faq_docs.append(Document(
-                    page_content=variation,
-                    metadata={
-                        "faq_id": faq["id"],
-                        "answer": faq["answer"],
-                        "type": "variation"
-                    }
-                ))
-        
-        # Create vector store
-        faq_vectorstore = Chroma.from_documents(
-            documents=faq_docs,
-            embedding=self.embeddings,
-            collection_name=Config.FAQ_COLLECTION,
-            persist_directory=Config.VECTOR_STORE_DIR
-        )
+            for n, variation in enumerate(faq.get("variations", [])):
+                ids.append(f"{faq['id']}_v{n}")
+                texts.append(variation)
+                metadatas.append({
+                    "faq_id": faq["id"],
+                    "type": "variation"
+                })
+        
+        FAQAnswerStore.save({faq["id"]: faq["answer"] for faq in faqs})
         
-        print(f"FAQ index created with {len(faq_docs)} entries.")
+        faq_vectorstore = self._sync_collection(Config.FAQ_COLLECTION, ids, texts, metadatas)
+        
+        # Snapshot for the in-memory FAQ backend, in the same order as the collection
+        stored = faq_vectorstore._collection.get(include=["documents", "metadatas", "embeddings"])
+        NumpyFAQIndex.save(stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"])
+        
+        print(f"FAQ index created with {len(ids)} entries.")
         return faq_vectorstore
     
     def create_document_index(self) -> Chroma:
-        """Create vector index for augmented documents"""
+        """Create or update the vector index for augmented documents"""
         print("Creating document vector index...")
         
         # Load augmented documents
@@ -79,30 +83,103 @@ class VectorIndexer:
             print("No augmented documents found. Run urag_preparation.py first.")
             return None
         
-        # Create documents for vector store
-        doc_docs = []
+        # Create entries for the vector store
+        ids, texts, metadatas = [], [], []
         for doc in docs:
-            doc_docs.append(Document(
-                page_content=doc["augmented_content"],
-                metadata={
-                    "doc_id": doc["id"],
-                    "url": doc["metadata"]["url"],
-                    "title": doc["metadata"]["title"],
-                    "section": doc["metadata"]["section"],
-                    "summary": doc["summary"]
-                }
-            ))
-        
-        # Create vector store
-        doc_vectorstore = Chroma.from_documents(
-            documents=doc_docs,
-            embedding=self.embeddings,
-            collection_name=Config.DOC_COLLECTION,
+            ids.append(doc["id"])
+            texts.append(doc["augmented_content"])
+            metadatas.append({
+                "doc_id": doc["id"],
+                "url": doc["metadata"]["url"],
+                "title": doc["metadata"]["title"],
+                "section": doc["metadata"]["section"],
+                "summary": doc["summary"]
+            })
+        
+        doc_vectorstore = self._sync_collection(Config.DOC_COLLECTION, ids, texts, metadatas)
+        
+        # Lexical index for hybrid retrieval; the raw chunk keeps exact tokens the rewrite may drop
+        BM25Index.save(ids, [f"{doc['content']}\n{doc['augmented_content']}" for doc in docs])
+        
+        # Snapshot for the quantized document backend
+        stored = doc_vectorstore._collection.get(include=["documents", "metadatas", "embeddings"])
+        QuantizedDocIndex.save(stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"])
+        
+        # Section centroids for routing queries to a partition of the index
+        SectionRouter.save(stored["metadatas"], stored["embeddings"])
+        
+        print(f"Document index created with {len(ids)} entries.")
+        return doc_vectorstore
+    
+    def _sync_collection(
+        self,
+        collection_name: str,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]]
+    ) -> Chroma:
+        """
+        Bring a collection in line with the given entries: only new or changed
+        texts are embedded, changed metadata is updated in place and ids that
+        are no longer present are deleted.
+        """
+        vectorstore = Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embeddings,
             persist_directory=Config.VECTOR_STORE_DIR
         )
+        collection = vectorstore._collection
         
-        print(f"Document index created with {len(doc_docs)} entries.")
-        return doc_vectorstore
+        existing = collection.get(include=["documents", "metadatas", "embeddings"])
+        current = {
+            id_: (text, metadata, embedding)
+            for id_, text, metadata, embedding in zip(
+                existing["ids"], existing["documents"], existing["metadatas"], existing["embeddings"]
+            )
+        }
+        # Texts that moved to a new id (e.g. FAQs renumbered) keep their embedding;
+        # newer chromadb returns numpy rows, which cannot be mixed with lists on upsert
+        known_embeddings = {
+            text: embedding.tolist() if hasattr(embedding, "tolist") else embedding
+            for text, _, embedding in current.values()
+        }
+        
+        wanted = set(ids)
+        stale = [id_ for id_ in current if id_ not in wanted]
+        
+        upserts = []
+        for id_, text, metadata in zip(ids, texts, metadatas):
+            if id_ in current and current[id_][:2] == (text, metadata):
+                continue
+            upserts.append((id_, text, metadata))
+        
+        to_embed = sorted({text for _, text, _ in upserts if text not in known_embeddings})
+        if to_embed:
+            known_embeddings.update(zip(to_embed, self.embeddings.embed_documents(to_embed)))
+        
+        # Upserts merge metadata, so entries that lost metadata keys are re-added
+        removed = len(stale)
+        stale += [
+            id_ for id_, _, metadata in upserts
+            if id_ in current and set(current[id_][1] or {}) - set(metadata)
+        ]
+        for start in range(0, len(stale), self.UPSERT_BATCH_SIZE):
+            collection.delete(ids=stale[start:start + self.UPSERT_BATCH_SIZE])
+        
+        for start in range(0, len(upserts), self.UPSERT_BATCH_SIZE):
+            batch = upserts[start:start + self.UPSERT_BATCH_SIZE]
+            collection.upsert(
+                ids=[id_ for id_, _, _ in batch],
+                documents=[text for _, text, _ in batch],
+                metadatas=[metadata for _, _, metadata in batch],
+                embeddings=[known_embeddings[text] for _, text, _ in batch]
+            )
+        
+        print(
+            f"{collection_name}: {len(upserts)} upserted ({len(to_embed)} new texts), "
+            f"{removed} removed, {len(ids) - len(upserts)} unchanged."
+        )
+        return vectorstore
     
     def load_existing_indexes(self):
         """Load existing vector stores"""
@@ -73,24 +73,37 @@ export const ChatWidget: React.FC<ChatWidgetProps> = ({ position = 'bottom-right
         throw new Error('Backend not connected');
       }
 
-      const response = await apiService.query({ question: userMessage.content });
-      
-      const assistantMessage: ChatMessageType = {
-        id: `assistant-${Date.now()}`,
-        role: 'assistant',
-        content: response.response,
-        timestamp: new Date(),
-        searchResult: {
-          type: response.type,
-          content: response.response,
-          confidence: response.confidence,
-          sources: response.sources,
-          faqId: response.faq_id,
-          documentIds: response.document_ids
-        }
-      };
+      const assistantId = `assistant-${Date.now()}`;
+      const updateAssistant = (update: (message: ChatMessageType) => ChatMessageType) =>
+        setMessages(prev => prev.map(message => (message.id === assistantId ? update(message) : message)));
 
-      setMessages(prev => [...prev, assistantMessage]);
+      // The message appears with the first event and fills in as tokens stream
+      const response = await apiService.queryStream({ question: userMessage.content }, {
+        onMeta: (meta) => {
+          setIsLoading(false);
+          setMessages(prev => [...prev, {
+            id: assistantId,
+            role: 'assistant',
+            content: '',
+            timestamp: new Date(),
+            searchResult: {
+              type: meta.type,
+              content: '',
+              confidence: meta.confidence,
+              sources: meta.sources,
+              faqId: meta.faq_id,
+              documentIds: meta.document_ids
+            }
+          }]);
+        },
+        onToken: (text) => updateAssistant(message => ({ ...message, content: message.content + text }))
+      });
+
+      updateAssistant(message => ({
+        ...message,
+        content: response.response,
+        searchResult: message.searchResult && { ...message.searchResult, content: response.response }
+      }));
     } catch (error) {
       const errorMessage: ChatMessageType = {
         id: `error-${Date.now()}`,
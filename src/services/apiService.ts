@@ -16,6 +16,13 @@ export interface QueryResponse {
   matched_question?: string;
 }
 
+export type StreamMeta = Omit<QueryResponse, 'response'>;
+
+export interface StreamHandlers {
+  onMeta: (meta: StreamMeta) => void;
+  onToken: (text: string) => void;
+}
+
 export interface StatsResponse {
   faq_count: number;
   document_count: number;
@@ -54,6 +61,70 @@ class ApiService {
     });
   }
 
+  // Streams /query/stream (Server-Sent Events). FAQ hits arrive as one "answer"
+  // event; generated answers send "meta" first and then "token" events.
+  async queryStream(request: QueryRequest, handlers: StreamHandlers): Promise<QueryResponse> {
+    let response: Response;
+    try {
+      response = await fetch(`${API_BASE_URL}/query/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(request),
+      });
+    } catch {
+      throw new Error('Cannot connect to URAG backend. Make sure the Python API server is running on port 8000.');
+    }
+
+    if (!response.ok || !response.body) {
+      throw new Error(`API Error: ${response.status} - ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let meta: StreamMeta | null = null;
+    let text = '';
+
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const rawEvent = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+        const dataLine = rawEvent.match(/^data: (.*)$/m)?.[1];
+        if (!eventName || dataLine === undefined) continue;
+        const data = JSON.parse(dataLine);
+
+        if (eventName === 'answer') {
+          const { content, ...rest } = data;
+          handlers.onMeta(rest);
+          handlers.onToken(content);
+          return { ...rest, response: content };
+        }
+        if (eventName === 'meta') {
+          meta = data;
+          handlers.onMeta(data);
+        } else if (eventName === 'token') {
+          text += data.text;
+          handlers.onToken(data.text);
+        } else if (eventName === 'error') {
+          throw new Error(data.content ?? data.detail ?? 'Error processing your question. Please try again.');
+        }
+      }
+    }
+
+    if (!meta) {
+      throw new Error('The response stream ended unexpectedly.');
+    }
+    return { ...meta, response: text };
+  }
+
   async getStats(): Promise<StatsResponse> {
     return this.makeRequest<StatsResponse>('/stats');
   }